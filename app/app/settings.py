@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -80,6 +81,52 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Token to user lookups. Must be shared by all worker processes so
+    # that invalidations reach all of them, startup fails otherwise.
+    'auth': {
+        'BACKEND': os.environ.get(
+            'TOKEN_AUTH_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('TOKEN_AUTH_CACHE_LOCATION', 'auth'),
+        'TIMEOUT': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('TOKEN_AUTH_CACHE_MAX_ENTRIES', 10000)
+            ),
+        },
+    },
+    # Keys are per user, version and query, so size it for many of them.
+    'lists': {
+        'BACKEND': os.environ.get(
+            'RECIPE_LIST_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('RECIPE_LIST_CACHE_LOCATION', 'lists'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('RECIPE_LIST_CACHE_MAX_ENTRIES', 10000)
+            ),
+        },
+    },
+}
+
+TOKEN_AUTH_CACHE_ALIAS = 'auth'
+
+# Per-user cache of recipe, tag and ingredient list responses. Writes
+# invalidate a user's lists by replacing a version key, so the cache
+# must be shared by all worker processes, startup fails otherwise.
+RECIPE_LIST_CACHE_ALIAS = 'lists'
+RECIPE_LIST_CACHE_TTL = int(os.environ.get('RECIPE_LIST_CACHE_TTL', 600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -120,6 +167,17 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media/'
 STATIC_ROOT = '/vol/web/static/'
 
+# How media files are served: 'python' streams them from the app,
+# 'x-accel-redirect' (nginx) and 'x-sendfile' (Apache, lighttpd) hand them
+# to the front server, and '' leaves media to DEBUG static() or the proxy.
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'python')
+# Internal location the front server maps to MEDIA_ROOT.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/'
+)
+# Stored media files are never rewritten in place.
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 86400))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -129,7 +187,57 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson-backed JSON, falling back to DRF's when it is not installed.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Default and maximum (?page_size=) page sizes for list endpoints.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# Default and maximum number of tag/ingredient autocomplete matches.
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 25
+
+# Serve recipe list and detail reads through recipe.fastpath.
+RECIPE_FAST_READ_PATH = bool(int(os.environ.get('RECIPE_FAST_READ_PATH', 1)))
+
+# Recipes read and written per chunk by the NDJSON export.
+RECIPE_EXPORT_CHUNK_SIZE = int(
+    os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000)
+)
+
+# Maximum number of recipes accepted by one bulk-create request.
+RECIPE_BULK_CREATE_MAX = int(os.environ.get('RECIPE_BULK_CREATE_MAX', 1000))
+
+# Resized copies generated for every uploaded recipe image, by name.
+RECIPE_IMAGE_VARIANTS = {
+    'thumb': {'size': (200, 200), 'format': 'JPEG', 'quality': 80},
+    'medium': {'size': (800, 800), 'format': 'JPEG', 'quality': 85},
+    'webp': {'size': (1600, 1600), 'format': 'WEBP', 'quality': 80},
 }
+# Variants are generated by a bounded pool of worker threads, with at
+# most RECIPE_IMAGE_QUEUE_MAX images queued before uploads wait. Under
+# uWSGI this needs enable-threads. Jobs pending when a worker exits are
+# lost, run backfill_image_variants to generate them.
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_QUEUE_MAX = int(os.environ.get('RECIPE_IMAGE_QUEUE_MAX', 64))
+RECIPE_IMAGE_ASYNC = bool(int(os.environ.get('RECIPE_IMAGE_ASYNC', 1)))
+# Largest accepted recipe image upload, in bytes and in pixels.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40_000_000)
+)
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST':True,
@@ -14,16 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
 )
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.media import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema', SpectacularAPIView.as_view(), name='api-schema'),
@@ -32,7 +36,15 @@ urlpatterns = [
     path('api/recipe/', include('recipe.urls')),
 ]
 
-if settings.DEBUG:
+if settings.MEDIA_SERVE_MODE:
+    urlpatterns += [
+        re_path(
+            rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$',
+            serve_media,
+            name='media',
+        ),
+    ]
+elif settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
         document_root = settings.MEDIA_ROOT,
@@ -0,0 +1,112 @@
+"""
+Authentication classes for the APIs.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.authtoken.models import Token
+
+
+def token_cache_key(key):
+    """Return the cache key holding the token for a key."""
+    return f'auth:token:{key}'
+
+
+def version_cache_key(key):
+    """Return the cache key holding the current version of a token."""
+    return f'auth:version:{key}'
+
+
+def get_auth_cache():
+    """Return the cache used for token lookups."""
+    return caches[settings.TOKEN_AUTH_CACHE_ALIAS]
+
+
+def _drop_tokens(keys):
+    get_auth_cache().delete_many([
+        cache_key for key in keys
+        for cache_key in (token_cache_key(key), version_cache_key(key))
+    ])
+
+
+def invalidate_tokens(keys):
+    """Drop cached tokens, now and once the transaction commits."""
+    keys = list(keys)
+    _drop_tokens(keys)
+    # Drop anything cached from data read before the write committed.
+    transaction.on_commit(lambda: _drop_tokens(keys))
+
+
+def invalidate_token(key):
+    """Drop a cached token."""
+    invalidate_tokens([key])
+
+
+def invalidate_user(user_id):
+    """Drop the cached tokens belonging to a user."""
+    invalidate_tokens(
+        Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token to user lookup."""
+    _stats_lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def _record(cls, hit):
+        with cls._stats_lock:
+            if hit:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+
+    @classmethod
+    def stats(cls):
+        """Return the hit and miss counters of this process."""
+        with cls._stats_lock:
+            return {'hits': cls.hits, 'misses': cls.misses}
+
+    @classmethod
+    def reset_stats(cls):
+        """Reset the hit and miss counters."""
+        with cls._stats_lock:
+            cls.hits = 0
+            cls.misses = 0
+
+    def authenticate_credentials(self, key):
+        """Return the user for a token key, using the cache if possible.
+
+        Cached tokens are stored with the version of their key current
+        when the database was read. Invalidation drops the version, so
+        tokens read before it, even if cached afterwards, are not used.
+        """
+        cache = get_auth_cache()
+        token_key, version_key = token_cache_key(key), version_cache_key(key)
+        cached = cache.get_many([token_key, version_key])
+        if token_key in cached and version_key in cached:
+            version, token = cached[token_key]
+            if version == cached[version_key] and token.user.is_active:
+                self._record(hit=True)
+                return (token.user, token)
+
+        self._record(hit=False)
+        version = cached.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex)
+            version = cache.get(version_key)
+        try:
+            user, token = super().authenticate_credentials(key)
+        except AuthenticationFailed:
+            # Unknown keys must not fill the cache.
+            cache.delete(version_key)
+            raise
+        cache.set(token_key, (version, token))
+        return (user, token)
@@ -0,0 +1,63 @@
+"""
+Helpers shared by the benchmark commands.
+"""
+import io
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    """Raised to discard the writes of a benchmark."""
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def seed_dataset(users=1, seed=0, **distributions):
+    """Generate users with seed_data and return the first one.
+
+    distributions are seed_data's count options, such as
+    recipes_per_user='1000'. Emails get a random prefix, so datasets can
+    be generated next to existing ones, including earlier seeds.
+    """
+    prefix = f'bench-{uuid.uuid4().hex[:12]}'
+    call_command(
+        'seed_data',
+        users=users,
+        seed=seed,
+        email_prefix=prefix,
+        stdout=io.StringIO(),
+        **{key: str(value) for key, value in distributions.items()},
+    )
+    return get_user_model().objects.get(
+        email=f'{prefix}-{seed}-0@example.com',
+    )
+
+
+def time_calls(func, repeat):
+    """Return the sorted milliseconds taken by repeat calls of func."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def percentile(timings, percent):
+    """Return the nearest-rank percentile of sorted timings."""
+    rank = max(1, round(percent / 100 * len(timings)))
+    return timings[min(rank, len(timings)) - 1]
@@ -0,0 +1,56 @@
+"""
+Bulk loading helpers for Postgres.
+"""
+import io
+
+from django.db import connection
+
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r',
+})
+
+
+def reserve_ids(model, count):
+    """Return count new primary keys drawn from the model's sequence."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def _copy_value(value):
+    """Return value in COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def copy_rows(model, columns, rows):
+    """Load rows of column values into the model's table with COPY.
+
+    Columns left out, such as generated ones, get their defaults. Returns
+    the number of rows loaded.
+    """
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join(map(_copy_value, row)))
+        buffer.write('\n')
+        count += 1
+    if not count:
+        return 0
+
+    quote = connection.ops.quote_name
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(model._meta.db_table)} '
+            f'({", ".join(map(quote, columns))}) FROM STDIN',
+            buffer,
+        )
+    return count
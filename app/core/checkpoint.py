@@ -0,0 +1,26 @@
+"""
+Checkpoint files of resumable management commands.
+"""
+import json
+import os
+
+
+def read_checkpoint(path, key, default=None):
+    """Return the value saved under key, or default without a checkpoint."""
+    if not path or not os.path.exists(path):
+        return default
+    with open(path) as checkpoint:
+        return json.load(checkpoint)[key]
+
+
+def write_checkpoint(path, key, value):
+    """Save value under key, replacing the checkpoint atomically."""
+    with open(f'{path}.tmp', 'w') as checkpoint:
+        json.dump({key: value}, checkpoint)
+    os.replace(f'{path}.tmp', path)
+
+
+def clear_checkpoint(path):
+    """Remove the checkpoint of a finished run."""
+    if path and os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,36 @@
+"""
+Startup checks of the cache configuration.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def worker_processes():
+    """Return the number of uWSGI worker processes, 1 outside of uWSGI."""
+    try:
+        import uwsgi
+    except ImportError:
+        return 1
+    return uwsgi.numproc
+
+
+def check_shared_caches(setting_names):
+    """Fail when caches named by settings are local to each worker.
+
+    Invalidations of a process local cache only reach the worker that
+    made them, so the other workers would serve stale entries.
+    """
+    processes = worker_processes()
+    if processes <= 1:
+        return
+    for name in setting_names:
+        alias = getattr(settings, name)
+        backend = settings.CACHES[alias]['BACKEND']
+        if backend in PROCESS_LOCAL_BACKENDS:
+            raise ImproperlyConfigured(
+                f'{name} uses the process local cache {alias!r} with '
+                f'{processes} worker processes. Configure a shared backend '
+                f'for it, such as memcached, Redis or a file based cache.'
+            )
@@ -0,0 +1,62 @@
+"""
+Django command to generate missing recipe image variants.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import generate_variants
+
+
+class Command(BaseCommand):
+    """Generate the variants of recipe images that have none recorded.
+
+    Variants are generated by a thread pool in the web process, so jobs
+    still queued or running when a worker exits are lost and their
+    recipes keep no variants. This renders them, reusing the variant
+    files that already exist. Recipes are read in batches by id.
+    """
+    help = 'Generate the missing variants of recipe images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        # Also skips the NULL images of recipes loaded with COPY.
+        pending = Recipe.objects.filter(image__gt='').exclude(
+            image_variants__has_keys=list(settings.RECIPE_IMAGE_VARIANTS),
+        ).only('id', 'user_id', 'image').order_by('id')
+        last_id = 0
+        found = generated = failed = 0
+        start = time.perf_counter()
+
+        while batch := list(
+            pending.filter(id__gt=last_id)[:options['batch_size']]
+        ):
+            last_id = batch[-1].id
+            found += len(batch)
+            for recipe in batch:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Missing: {recipe.image.name}')
+                if options['dry_run']:
+                    continue
+                try:
+                    generate_variants(
+                        recipe.id, recipe.user_id, recipe.image.name,
+                    )
+                    generated += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(
+                        f'Recipe {recipe.id} ({recipe.image.name}): {exc}'
+                    )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Found {found} images without variants in '
+            f'{time.perf_counter() - start:.1f}s, generated {generated}, '
+            f'failed {failed}.'
+        ))
@@ -0,0 +1,100 @@
+"""
+Django command to benchmark tag and ingredient autocomplete.
+"""
+import statistics
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.functions import Upper
+
+from core.benchmark import percentile, rolled_back, seed_dataset, time_calls
+from core.models import Ingredient, Tag
+
+MODELS = {'tag': Tag, 'ingredient': Ingredient}
+# Prefixes, typos served by the fuzzy branch, and a term matching nothing.
+QUERIES = ('ga', 'garl', 'garlik', 'tomatoe', 'spicey', 'zzzz')
+
+
+class Command(BaseCommand):
+    """Time RecipeAttrQuerySet.autocomplete for one user among many.
+
+    Every user gets the same number of names, so queries that are not
+    confined to the user's rows slow down with --users. The data is
+    generated with seed_data and rolled back afterwards.
+    """
+    help = 'Benchmark tag and ingredient autocomplete latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=MODELS, default='ingredient')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--names-per-user', type=int, default=50000)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Print the plan of the fuzzy query of each term.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        with rolled_back():
+            user = self._seed(options)
+            self._run(user, MODELS[options['model']], options)
+
+    def _seed(self, options):
+        """Create users with the same number of names each."""
+        key = f'{options["model"]}s_per_user'
+        self.stdout.write(
+            f'Seeding {options["users"]} users with '
+            f'{options["names_per_user"]} {options["model"]}s each...'
+        )
+        counts = {'tags_per_user': 0, 'ingredients_per_user': 0}
+        counts[key] = options['names_per_user']
+        user = seed_dataset(
+            users=options['users'],
+            seed=options['seed'],
+            recipes_per_user=0,
+            **counts,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_tag, core_ingredient')
+        return user
+
+    def _run(self, user, model, options):
+        """Time each query term and print a summary."""
+        objects = model.objects.owned_by(user)
+        limit = options['limit']
+        self.stdout.write(
+            f'{"query":<10}{"rows":>6}{"p50 ms":>9}{"p95 ms":>9}'
+            f'{"p99 ms":>9}'
+        )
+        everything = []
+        for query in QUERIES:
+            rows = len(objects.autocomplete(query, limit))
+            timings = time_calls(
+                lambda: objects.autocomplete(query, limit),
+                options['repeat'],
+            )
+            everything += timings
+            self.stdout.write(
+                f'{query:<10}{rows:>6}{statistics.median(timings):>9.2f}'
+                f'{percentile(timings, 95):>9.2f}'
+                f'{percentile(timings, 99):>9.2f}'
+            )
+            if options['explain']:
+                self._explain(objects, query)
+
+        everything.sort()
+        self.stdout.write(
+            f'{"all":<10}{"":>6}{statistics.median(everything):>9.2f}'
+            f'{percentile(everything, 95):>9.2f}'
+            f'{percentile(everything, 99):>9.2f}'
+        )
+
+    def _explain(self, objects, query):
+        """Print the plan of the fuzzy match query of query."""
+        fuzzy = objects.annotate(key=Upper('name')).filter(
+            key__trigram_word_similar=query.upper(),
+        ).values('id')
+        self.stdout.write(fuzzy.explain(analyze=True))
@@ -0,0 +1,302 @@
+"""
+Django command to benchmark the API endpoints.
+"""
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.benchmark import percentile, rolled_back, seed_dataset
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import get_list_cache
+
+PASSWORD = 'bench-pass-123'
+SCENARIOS = (
+    'recipe-list', 'recipe-list-cached', 'recipe-list-search',
+    'recipe-detail', 'recipe-create', 'recipe-update', 'tag-list',
+    'ingredient-list', 'token', 'image-upload',
+)
+
+
+def _image(rng, size=(800, 600)):
+    """Return an uploadable JPEG file of a random colour."""
+    image_file = io.BytesIO()
+    color = tuple(rng.randrange(256) for _ in range(3))
+    Image.new('RGB', size, color).save(image_file, format='JPEG')
+    image_file.name = 'bench.jpg'
+    image_file.seek(0)
+    return image_file
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """Drive the API's URL routes in process and report per scenario stats.
+
+    Requests go through the full middleware, authentication, view and
+    renderer stack with DRF's test client, authenticated with a real token.
+    Each scenario is warmed up, timed, then run once more to count queries
+    and trace peak Python memory, so instrumentation does not skew the
+    timings. The dataset is generated with seed_data, or an existing user
+    is benchmarked with --user, in a transaction that is rolled back, so
+    image variants, generated after commit, are not part of the uploads.
+    """
+    help = 'Benchmark the API endpoints and report latency percentiles, ' \
+        'queries per request and peak memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of an existing user to benchmark instead of '
+                 'seeding a dataset.',
+        )
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--recipes-per-user', default='1000')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Run only this scenario, may be repeated.',
+        )
+        parser.add_argument('--output', help='Write results as JSON here.')
+        parser.add_argument(
+            '--compare', help='JSON results of a previous run to diff.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        unknown = set(options['scenarios'] or ()).difference(SCENARIOS)
+        if unknown:
+            raise CommandError(
+                f'Unknown scenarios: {", ".join(sorted(unknown))}. '
+                f'Available: {", ".join(SCENARIOS)}.'
+            )
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['scenarios']
+
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            MEDIA_ROOT=media,
+        ), rolled_back():
+            user = self._user(options)
+            results = self._run(user, options)
+
+        self._report(results, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'commit': _git_commit(),
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'options': {
+                        key: options[key] for key in (
+                            'user', 'users', 'recipes_per_user', 'seed',
+                            'repeat', 'warmup',
+                        )
+                    },
+                    'scenarios': results,
+                }, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
+
+    def _user(self, options):
+        """Return the benchmarked user, seeding a dataset if needed."""
+        model = get_user_model()
+        if options['user']:
+            try:
+                user = model.objects.get(email=options['user'])
+            except model.DoesNotExist:
+                raise CommandError(f'No user {options["user"]}.')
+        else:
+            self.stdout.write('Seeding dataset...')
+            user = seed_dataset(
+                users=options['users'],
+                seed=options['seed'],
+                recipes_per_user=options['recipes_per_user'],
+            )
+        user.set_password(PASSWORD)
+        user.save(update_fields=['password'])
+        return user
+
+    def _scenarios(self, user, rng):
+        """Return the scenarios as {name: (prepare, request)}."""
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        recipe_ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+        )
+        if not recipe_ids:
+            raise CommandError(f'{user.email} has no recipes.')
+        tags = list(
+            Tag.objects.filter(user=user).values_list('name', flat=True)
+        )
+        ingredients = list(
+            Ingredient.objects.filter(user=user).values_list('name', flat=True)
+        )
+        recipes_url = reverse('recipe:recipe-list')
+
+        def detail():
+            return reverse(
+                'recipe:recipe-detail', args=[rng.choice(recipe_ids)],
+            )
+
+        def new_recipe():
+            return {
+                'title': f'Bench recipe {rng.random()}',
+                'time_minutes': rng.randint(5, 120),
+                'price': f'{rng.randint(100, 9999) / 100:.2f}',
+                'tags': [
+                    {'name': name}
+                    for name in rng.sample(tags, min(3, len(tags)))
+                ] + [{'name': 'Bench'}],
+                'ingredients': [
+                    {'name': name} for name in rng.sample(
+                        ingredients, min(5, len(ingredients)),
+                    )
+                ],
+            }
+
+        def upload():
+            return client.post(
+                reverse(
+                    'recipe:recipe-upload-image',
+                    args=[rng.choice(recipe_ids)],
+                ),
+                {'image': _image(rng)},
+                format='multipart',
+            )
+
+        clear_lists = get_list_cache().clear
+        return {
+            'recipe-list': (clear_lists, lambda: client.get(recipes_url)),
+            'recipe-list-cached': (
+                None, lambda: client.get(recipes_url),
+            ),
+            'recipe-list-search': (
+                clear_lists,
+                lambda: client.get(recipes_url, {'search': 'lemon pasta'}),
+            ),
+            'recipe-detail': (None, lambda: client.get(detail())),
+            'recipe-create': (
+                None,
+                lambda: client.post(recipes_url, new_recipe(), format='json'),
+            ),
+            'recipe-update': (
+                None,
+                lambda: client.patch(
+                    detail(), {'title': f'Updated {rng.random()}'},
+                    format='json',
+                ),
+            ),
+            'tag-list': (
+                clear_lists, lambda: client.get(reverse('recipe:tag-list')),
+            ),
+            'ingredient-list': (
+                clear_lists,
+                lambda: client.get(reverse('recipe:ingredient-list')),
+            ),
+            'token': (
+                None,
+                lambda: APIClient().post(reverse('user:token'), {
+                    'email': user.email, 'password': PASSWORD,
+                }),
+            ),
+            'image-upload': (None, upload),
+        }
+
+    def _measure(self, prepare, request, options):
+        """Return the stats of a scenario."""
+        timings = []
+        for i in range(options['warmup'] + options['repeat']):
+            if prepare:
+                prepare()
+            start = time.perf_counter()
+            response = request()
+            elapsed = (time.perf_counter() - start) * 1000
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'Request failed with {response.status_code}: '
+                    f'{response.content[:200]!r}'
+                )
+            if i >= options['warmup']:
+                timings.append(elapsed)
+
+        if prepare:
+            prepare()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': len(queries),
+            'peak_kib': round(peak / 1024, 1),
+            'bytes': len(response.content),
+        }
+
+    def _run(self, user, options):
+        """Run the selected scenarios, return their stats by name."""
+        scenarios = self._scenarios(user, random.Random(options['seed']))
+        results = {}
+        for name in options['scenarios'] or SCENARIOS:
+            self.stdout.write(f'Running {name}...')
+            results[name] = self._measure(*scenarios[name], options)
+        return results
+
+    def _report(self, results, baseline):
+        """Print the results, with p50 changes against a baseline."""
+        header = (
+            f'{"scenario":<20}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+            f'{"queries":>9}{"peak KiB":>10}'
+        )
+        self.stdout.write(header + ('  p50 vs baseline' if baseline else ''))
+        for name, stats in results.items():
+            line = (
+                f'{name:<20}{stats["p50_ms"]:>9.2f}{stats["p95_ms"]:>9.2f}'
+                f'{stats["p99_ms"]:>9.2f}{stats["queries"]:>9}'
+                f'{stats["peak_kib"]:>10.1f}'
+            )
+            previous = (baseline or {}).get(name)
+            if previous:
+                change = stats['p50_ms'] / previous['p50_ms'] - 1
+                line += f'  {change:+.1%}'
+            self.stdout.write(line)
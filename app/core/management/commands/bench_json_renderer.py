@@ -0,0 +1,84 @@
+"""
+Django command to benchmark the JSON renderer and parser.
+"""
+import io
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmark import percentile, rolled_back, seed_dataset, time_calls
+from core.models import Recipe
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from recipe.serializers import RecipeSerializer
+
+
+def _time(func, repeat):
+    """Return the median and p95 milliseconds of calling func."""
+    timings = time_calls(func, repeat)
+    return statistics.median(timings), percentile(timings, 95)
+
+
+class Command(BaseCommand):
+    """Compare FastJSONRenderer/Parser with DRF's on RecipeSerializer data.
+
+    The recipes are generated with seed_data and rolled back afterwards.
+    """
+    help = 'Benchmark the JSON renderer and parser on recipe list data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        with rolled_back():
+            data = self._seed(options)
+            self._run(data, options)
+
+    def _seed(self, options):
+        """Create recipes and return their serialized data."""
+        self.stdout.write(f'Seeding {options["recipes"]} recipes...')
+        user = seed_dataset(
+            seed=options['seed'],
+            recipes_per_user=options['recipes'],
+            tags_per_user=50,
+            ingredients_per_user=200,
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+        )
+        queryset = Recipe.objects.filter(user=user).prefetch_related(
+            'tags', 'ingredients'
+        ).order_by('-id')
+        return RecipeSerializer(queryset, many=True).data
+
+    def _run(self, data, options):
+        """Time each renderer and parser and print a summary."""
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        content = stock.render(data)
+        if fast.render(data) != content:
+            raise CommandError('FastJSONRenderer output differs.')
+
+        repeat = options['repeat']
+        rows = {
+            'render: JSONRenderer': _time(lambda: stock.render(data), repeat),
+            'render: FastJSONRenderer': _time(
+                lambda: fast.render(data), repeat
+            ),
+            'parse: JSONParser': _time(
+                lambda: JSONParser().parse(io.BytesIO(content)), repeat
+            ),
+            'parse: FastJSONParser': _time(
+                lambda: FastJSONParser().parse(io.BytesIO(content)), repeat
+            ),
+        }
+
+        self.stdout.write(f'{len(content)} bytes per payload')
+        self.stdout.write(f'{"mode":<26}{"median ms":>12}{"p95 ms":>10}')
+        for name, (median, p95) in rows.items():
+            self.stdout.write(f'{name:<26}{median:>12.2f}{p95:>10.2f}')
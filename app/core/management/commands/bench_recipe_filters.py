@@ -0,0 +1,86 @@
+"""
+Django command to benchmark the recipe tag filters.
+"""
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import percentile, rolled_back, seed_dataset, time_calls
+from core.models import Recipe, Tag
+
+
+class Command(BaseCommand):
+    """Compare join + DISTINCT and semi-join filtering of recipes by tags.
+
+    The recipes are generated with seed_data and rolled back afterwards.
+    """
+    help = 'Benchmark recipe filtering by tags (match=any and match=all).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=4)
+        parser.add_argument('--filter-tags', type=int, default=2)
+        parser.add_argument('--description-length', type=int, default=1000)
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='Rows fetched per query, 0 for all matching rows.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        with rolled_back():
+            user, tags = self._seed(options)
+            self._run(user, tags, options)
+
+    def _seed(self, options):
+        """Create a user with tagged recipes."""
+        self.stdout.write(f'Seeding {options["recipes"]} recipes...')
+        user = seed_dataset(
+            seed=options['seed'],
+            recipes_per_user=options['recipes'],
+            tags_per_user=options['tags'],
+            ingredients_per_user=0,
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=0,
+            description_length=options['description_length'],
+        )
+        return user, list(Tag.objects.filter(user=user).order_by('id'))
+
+    def _modes(self, user, tag_ids):
+        """Return the querysets to compare, by name."""
+        recipes = Recipe.objects.filter(user=user)
+        chained = recipes
+        for tag_id in tag_ids:
+            chained = chained.filter(tags__id=tag_id)
+        return {
+            'any: join + DISTINCT': (
+                recipes.filter(tags__id__in=tag_ids).distinct()
+            ),
+            'any: EXISTS': recipes.with_tags(tag_ids),
+            'all: join per tag': chained,
+            'all: grouped': recipes.with_tags(tag_ids, match_all=True),
+        }
+
+    def _run(self, user, tags, options):
+        """Time each filter mode and print a summary."""
+        tag_ids = [tag.id for tag in tags[:options['filter_tags']]]
+        self.stdout.write(
+            f'{"mode":<24}{"rows":>8}{"median ms":>12}{"p95 ms":>10}'
+        )
+        for name, queryset in self._modes(user, tag_ids).items():
+            queryset = queryset.order_by('-id')
+            if options['limit']:
+                queryset = queryset[:options['limit']]
+
+            rows = len(list(queryset.all()))
+            timings = time_calls(
+                lambda: list(queryset.all()), options['repeat'],
+            )
+            self.stdout.write(
+                f'{name:<24}{rows:>8}'
+                f'{statistics.median(timings):>12.2f}'
+                f'{percentile(timings, 95):>10.2f}'
+            )
@@ -0,0 +1,82 @@
+"""
+Django command to benchmark the compiled recipe read path.
+"""
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+from core.benchmark import percentile, rolled_back, seed_dataset, time_calls
+from core.models import Ingredient, Recipe, Tag
+from recipe.fastpath import get_reader
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    """Compare RecipeSerializer with the compiled read path on one page.
+
+    The recipes are generated with seed_data and rolled back afterwards.
+    """
+    help = 'Benchmark serializing a page of recipes with and without ' \
+        'the compiled read path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        with rolled_back():
+            user = self._seed(options)
+            self._run(user, options)
+
+    def _seed(self, options):
+        """Create a user with tagged recipes."""
+        self.stdout.write(f'Seeding {options["recipes"]} recipes...')
+        return seed_dataset(
+            seed=options['seed'],
+            recipes_per_user=options['recipes'],
+            tags_per_user=50,
+            ingredients_per_user=200,
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+        )
+
+    def _run(self, user, options):
+        """Time both paths and print a summary."""
+        queryset = Recipe.objects.filter(user=user).order_by('-id')
+        prefetched = queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredients', queryset=Ingredient.objects.order_by('id'),
+            ),
+        )
+        reader = get_reader(RecipeSerializer)
+        instances = list(prefetched)
+        rows = list(reader.rows(queryset))
+
+        modes = {
+            'serializer: total': lambda: RecipeSerializer(
+                list(prefetched), many=True
+            ).data,
+            'serializer: serialize': lambda: RecipeSerializer(
+                instances, many=True
+            ).data,
+            'fast path: total': lambda: reader.serialize(
+                reader.rows(queryset)
+            ),
+            'fast path: serialize': lambda: reader.serialize(rows),
+        }
+        if modes['serializer: total']() != modes['fast path: total']():
+            raise CommandError('Fast path output differs.')
+
+        self.stdout.write(f'{"mode":<24}{"median ms":>12}{"p95 ms":>10}')
+        for name, func in modes.items():
+            timings = time_calls(func, options['repeat'])
+            self.stdout.write(
+                f'{name:<24}{statistics.median(timings):>12.2f}'
+                f'{percentile(timings, 95):>10.2f}'
+            )
@@ -0,0 +1,201 @@
+"""
+Django command to delete recipe image files no recipe references.
+"""
+import itertools
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.checkpoint import (
+    clear_checkpoint, read_checkpoint, write_checkpoint,
+)
+from core.models import Recipe
+from core.storage import lock_content
+
+
+def _parts(directory):
+    """Return the sort key giving the walk order of a directory."""
+    return tuple(part for part in directory.split('/') if part)
+
+
+class Command(BaseCommand):
+    """Stream the recipe image directories and delete unreferenced files.
+
+    Directories are walked one at a time in a stable order and their files
+    are checked against the database in batches, so memory use does not
+    depend on the number of files. Progress is saved after each directory
+    to an optional checkpoint file, from which an interrupted run resumes.
+    """
+    help = 'Delete recipe image files that no recipe references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', default='uploads/recipe')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Skip files modified less than this many seconds ago.',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress, to resume interrupted runs.',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Repeat a pass every this many seconds, 0 to run once.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        storage = Recipe._meta.get_field('image').storage
+        self.root = storage.path('')
+        while True:
+            self._pass(options)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def _variant_stem(self, stem):
+        """Return the original's stem if stem names a variant, else None."""
+        for variant in settings.RECIPE_IMAGE_VARIANTS:
+            if stem.endswith(f'_{variant}'):
+                return stem[:-len(variant) - 1]
+        return None
+
+    def _directories(self, directory):
+        """Yield directory and those below it in a stable pre-order."""
+        yield directory
+        with os.scandir(os.path.join(self.root, directory)) as entries:
+            subdirectories = sorted(
+                entry.name for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+            )
+        for name in subdirectories:
+            yield from self._directories(f'{directory}/{name}')
+
+    def _files(self, directory):
+        """Yield the files of a directory."""
+        with os.scandir(os.path.join(self.root, directory)) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry
+
+    def _live_stems(self, stems):
+        """Return the stems of stems used by a recipe image."""
+        if not stems:
+            return set()
+        table = connection.ops.quote_name(Recipe._meta.db_table)
+        column = connection.ops.quote_name('image')
+        # One index range scan per stem in a single round trip, written
+        # as SQL since compiling hundreds of combined querysets is slow.
+        select = (
+            f'SELECT {column} FROM {table} '
+            f'WHERE {column} > %s AND {column} LIKE %s'
+        )
+        params = []
+        for stem in stems:
+            escaped = re.sub(r'([\\%_])', r'\\\1', stem)
+            params += ['', f'{escaped}.%']
+        with connection.cursor() as cursor:
+            cursor.execute(' UNION ALL '.join([select] * len(stems)), params)
+            return {
+                os.path.splitext(name)[0] for name, in cursor.fetchall()
+            }
+
+    def _orphans(self, batch):
+        """Return (name, entry, is_variant) for the files no recipe uses."""
+        originals, variants = {}, {}
+        for name, entry in batch:
+            stem = self._variant_stem(os.path.splitext(name)[0])
+            if stem is None:
+                originals[name] = entry
+            else:
+                variants[name] = (stem, entry)
+
+        referenced = set(Recipe.objects.filter(
+            image__in=list(originals),
+        ).values_list('image', flat=True))
+        live_stems = self._live_stems({stem for stem, _ in variants.values()})
+        return [
+            (name, entry, False) for name, entry in originals.items()
+            if name not in referenced
+        ] + [
+            (name, entry, True) for name, (stem, entry) in variants.items()
+            if stem not in live_stems
+        ]
+
+    def _delete(self, orphans):
+        """Delete orphans still unused under their locks, return the count.
+
+        The references are checked again while holding the locks of the
+        originals' stems, in case the same content was uploaded since the
+        batch was checked, and files are deleted before they are released.
+        """
+        with transaction.atomic():
+            lock_content(*(
+                self._variant_stem(os.path.splitext(name)[0]) or name
+                for name, _, _ in orphans
+            ))
+            confirmed = self._orphans(
+                [(name, entry) for name, entry, _ in orphans]
+            )
+            for _, entry, _ in confirmed:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        return len(confirmed)
+
+    def _pass(self, options):
+        """Scan the media tree once and delete or report orphans."""
+        root = options['root'].strip('/')
+        if not os.path.isdir(os.path.join(self.root, root)):
+            self.stdout.write(f'Nothing to collect under {root}.')
+            return
+
+        checkpoint = options['checkpoint']
+        done = read_checkpoint(checkpoint, 'directory')
+        cutoff = time.time() - options['min_age']
+        scanned = orphans = deleted = reclaimed = 0
+        start = time.perf_counter()
+
+        for directory in self._directories(root):
+            if done is not None and _parts(directory) <= _parts(done):
+                continue
+
+            files = (
+                (f'{directory}/{entry.name}', entry)
+                for entry in self._files(directory)
+                if entry.stat().st_mtime < cutoff
+            )
+            while batch := list(
+                itertools.islice(files, options['batch_size'])
+            ):
+                scanned += len(batch)
+                found = self._orphans(batch)
+                orphans += len(found)
+                for name, entry, _ in found:
+                    reclaimed += entry.stat().st_size
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'Orphan: {name}')
+                if found and not options['dry_run']:
+                    deleted += self._delete(found)
+
+            if checkpoint and not options['dry_run']:
+                write_checkpoint(checkpoint, 'directory', directory)
+
+        # A completed pass starts the next one from the beginning.
+        if not options['dry_run']:
+            clear_checkpoint(checkpoint)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} files in {elapsed:.1f}s '
+            f'({scanned / elapsed if elapsed else 0:.0f} files/s). '
+            f'Found {orphans} orphans ({reclaimed} bytes), '
+            f'deleted {deleted}.'
+        ))
@@ -0,0 +1,276 @@
+"""
+Django command to bulk import recipes from CSV or NDJSON.
+"""
+import csv
+import itertools
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.bulk import copy_rows, reserve_ids
+from core.checkpoint import (
+    clear_checkpoint, read_checkpoint, write_checkpoint,
+)
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import invalidate_user_lists
+
+# Separates tag and ingredient names in a CSV cell.
+CSV_NAME_SEPARATOR = '|'
+RELATIONS = (('tags', Tag), ('ingredients', Ingredient))
+# Largest value of a Postgres integer column.
+MAX_INTEGER = 2 ** 31 - 1
+
+
+def _text(record, key, max_length=None, required=False):
+    value = record.get(key)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f'{key} is required.')
+    if '\x00' in value:
+        raise ValueError(f'{key} contains a NUL character.')
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f'{key} is longer than {max_length} characters.')
+    return value
+
+
+def _names(value):
+    """Return the distinct names of a list of names or {'name'} items."""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(CSV_NAME_SEPARATOR)
+    if not isinstance(value, list):
+        raise ValueError('Expected a list of names.')
+    names = []
+    for item in value:
+        name = item.get('name') if isinstance(item, dict) else item
+        name = '' if name is None else str(name).strip()
+        if '\x00' in name:
+            raise ValueError('Name contains a NUL character.')
+        if len(name) > Tag._meta.get_field('name').max_length:
+            raise ValueError(f'Name too long: {name[:20]}...')
+        if name:
+            names.append(name)
+    return list(dict.fromkeys(names))
+
+
+def _minutes(value):
+    """Return time_minutes as an int, rejecting fractions and overflow."""
+    try:
+        if isinstance(value, bool):
+            raise InvalidOperation
+        minutes = Decimal(str(value).strip())
+        if minutes != minutes.to_integral_value():
+            raise InvalidOperation
+    except InvalidOperation:
+        raise ValueError('time_minutes must be an integer.')
+    if not 0 <= minutes <= MAX_INTEGER:
+        raise ValueError(f'time_minutes must be from 0 to {MAX_INTEGER}.')
+    return int(minutes)
+
+
+def _parse(record, default_user):
+    """Return (email, recipe columns, {relation: names}) of a record."""
+    if not isinstance(record, dict):
+        raise ValueError('Expected an object.')
+    email = _text(record, 'user', 255) or default_user
+    if not email:
+        raise ValueError('user is required.')
+    time_minutes = _minutes(record.get('time_minutes'))
+    try:
+        price = Decimal(str(record.get('price')).strip())
+    except InvalidOperation:
+        raise ValueError('price must be a number.')
+    if not price.is_finite() or price != price.quantize(Decimal('0.01')) \
+            or abs(price) >= 1000:
+        raise ValueError('price must have at most 3 digits and 2 decimals.')
+
+    columns = {
+        'title': _text(record, 'title', 255, required=True),
+        'description': _text(record, 'description'),
+        'time_minutes': time_minutes,
+        'price': price.quantize(Decimal('0.01')),
+        'link': _text(record, 'link', 255),
+    }
+    names = {name: _names(record.get(name)) for name, _ in RELATIONS}
+    return email, columns, names
+
+
+class Command(BaseCommand):
+    """Load recipes with COPY, in batches committed one at a time.
+
+    Users are matched by email. Tags and ingredients are resolved per user
+    through an in-memory cache, creating the missing ones once. Recipe ids
+    are reserved from the sequence so recipes and both through tables are
+    loaded with COPY. After each batch the number of records done is saved
+    to an optional checkpoint file, from which an interrupted run resumes.
+    """
+    help = 'Bulk import recipes from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, - for stdin.')
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'],
+            help='Input format, by default from the file extension.',
+        )
+        parser.add_argument(
+            '--user', help='Email of the owner of records without a user.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress, to resume interrupted runs.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson'
+        )
+        checkpoint = options['checkpoint']
+        done = read_checkpoint(checkpoint, 'records', 0)
+        self.users, self.objects = {}, {model: {} for _, model in RELATIONS}
+        self.stats = {'recipes': 0, 'links': 0, 'errors': 0}
+        start = time.perf_counter()
+
+        with self._open(path) as source:
+            records = (
+                record for record in self._records(source, fmt)
+                if record[0] > done
+            )
+            while batch := list(
+                itertools.islice(records, options['batch_size'])
+            ):
+                with transaction.atomic():
+                    self._load(batch, options['user'])
+                done = batch[-1][0]
+                if checkpoint:
+                    write_checkpoint(checkpoint, 'records', done)
+                self._report(done, start)
+
+        clear_checkpoint(checkpoint)
+        elapsed = time.perf_counter() - start
+        rows = self.stats['recipes'] + self.stats['links']
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.stats["recipes"]} recipes and '
+            f'{self.stats["links"]} links in {elapsed:.1f}s '
+            f'({rows / elapsed if elapsed else 0:.0f} rows/s), '
+            f'skipped {self.stats["errors"]} invalid records.'
+        ))
+
+    def _open(self, path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+    def _records(self, source, fmt):
+        """Yield (number, record or None, error) for each input record."""
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(source), 1):
+                yield number, row, None
+            return
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line), None
+            except ValueError as exc:
+                yield number, None, f'Invalid JSON: {exc}'
+
+    def _error(self, number, message):
+        self.stats['errors'] += 1
+        self.stderr.write(f'Record {number}: {message}')
+
+    def _user_ids(self, emails):
+        """Return user ids by email, caching them across batches."""
+        missing = emails.difference(self.users)
+        if missing:
+            self.users.update(get_user_model().objects.filter(
+                email__in=missing,
+            ).values_list('email', 'id'))
+        return self.users
+
+    def _object_ids(self, model, keys):
+        """Return object ids by (user id, name), creating missing ones."""
+        cache = self.objects[model]
+        missing = [key for key in keys if key not in cache]
+        if missing:
+            # Upsert so objects created meanwhile are returned too.
+            created = model.objects.bulk_create(
+                [model(user_id=user, name=name) for user, name in missing],
+                update_conflicts=True,
+                unique_fields=['user', 'name'],
+                update_fields=['name'],
+            )
+            cache.update({(obj.user_id, obj.name): obj.id for obj in created})
+        return cache
+
+    def _load(self, batch, default_user):
+        """Load a batch of records in the current transaction."""
+        parsed = []
+        for number, record, error in batch:
+            if error is None:
+                try:
+                    parsed.append((number, *_parse(record, default_user)))
+                    continue
+                except ValueError as exc:
+                    error = str(exc)
+            self._error(number, error)
+
+        users = self._user_ids({email for _, email, _, _ in parsed})
+        recipes = []
+        for number, email, columns, names in parsed:
+            if email in users:
+                recipes.append((users[email], columns, names))
+            else:
+                self._error(number, f'Unknown user {email}.')
+        if not recipes:
+            return
+
+        ids = reserve_ids(Recipe, len(recipes))
+        fields = ['title', 'description', 'time_minutes', 'price', 'link']
+        self.stats['recipes'] += copy_rows(
+            Recipe,
+            ['id', 'user_id', *fields, 'image_variants'],
+            (
+                (recipe_id, user_id, *(columns[f] for f in fields), '{}')
+                for recipe_id, (user_id, columns, _) in zip(ids, recipes)
+            ),
+        )
+
+        for name, model in RELATIONS:
+            object_ids = self._object_ids(model, dict.fromkeys(
+                (user_id, obj_name)
+                for user_id, _, names in recipes
+                for obj_name in names[name]
+            ))
+            field = Recipe._meta.get_field(name)
+            self.stats['links'] += copy_rows(
+                field.remote_field.through,
+                ['recipe_id', f'{field.m2m_reverse_field_name()}_id'],
+                (
+                    (recipe_id, object_ids[user_id, obj_name])
+                    for recipe_id, (user_id, _, names) in zip(ids, recipes)
+                    for obj_name in names[name]
+                ),
+            )
+
+        # COPY bypasses the signals that invalidate the cache.
+        for user_id in {user_id for user_id, _, _ in recipes}:
+            invalidate_user_lists(user_id)
+
+    def _report(self, done, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{done} records read, {self.stats["recipes"]} recipes '
+            f'imported ({self.stats["recipes"] / elapsed:.0f} recipes/s).'
+        )
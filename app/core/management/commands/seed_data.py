@@ -0,0 +1,290 @@
+"""
+Django command to generate a synthetic dataset for load tests.
+"""
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from core.bulk import copy_rows, reserve_ids
+from core.models import Ingredient, Recipe, Tag
+
+WORDS = (
+    'apple basil butter carrot chili cream garlic ginger honey lemon lime '
+    'mint mushroom olive onion pepper potato rice salt sesame spinach '
+    'tomato vanilla yogurt baked braised crispy fresh grilled roasted '
+    'smoked spicy sweet tangy warm quick easy simple hearty light classic '
+    'soup salad stew curry pasta bread cake pie tart bowl toast noodles'
+).split()
+RELATIONS = ((Tag, 'tags'), (Ingredient, 'ingredients'))
+USERS_PER_TASK = 50
+DIST_KEYS = (
+    'recipes_per_user', 'tags_per_user', 'ingredients_per_user',
+    'tags_per_recipe', 'ingredients_per_recipe', 'description_length',
+)
+
+
+class Distribution:
+    """Integers drawn from a spec: N, MIN-MAX or exp:MEAN.
+
+    exp draws from an exponential distribution, giving the long tail of
+    real per-user counts.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        if match := re.fullmatch(r'(\d+)', spec):
+            self.low = self.high = int(match.group(1))
+            self.mean = None
+        elif match := re.fullmatch(r'(\d+)-(\d+)', spec):
+            self.low, self.high = sorted(map(int, match.groups()))
+            self.mean = None
+        elif match := re.fullmatch(r'exp:(\d+(?:\.\d+)?)', spec):
+            self.mean = float(match.group(1))
+        else:
+            raise CommandError(
+                f'Invalid distribution {spec!r}, expected N, MIN-MAX or '
+                f'exp:MEAN.'
+            )
+
+    def sample(self, rng):
+        if self.mean is not None:
+            return int(rng.expovariate(1 / self.mean)) if self.mean else 0
+        return rng.randint(self.low, self.high)
+
+
+def _corpus(seed):
+    """Return deterministic filler text for descriptions."""
+    rng = random.Random(f'{seed}:corpus')
+    return ' '.join(rng.choice(WORDS) for _ in range(20000))
+
+
+def _names(rng, prefix, count):
+    return [
+        f'{rng.choice(WORDS).title()} {prefix} {i}' for i in range(count)
+    ]
+
+
+class _Generator:
+    """Generates the data of users and loads it with COPY in batches."""
+
+    def __init__(self, options):
+        self.options = options
+        self.dist = {key: Distribution(options[key]) for key in DIST_KEYS}
+        self.corpus = _corpus(options['seed'])
+        self._reset()
+
+    def _reset(self):
+        self.objects = {Tag: [], Ingredient: []}
+        self.recipes = []
+
+    def _user(self, index, user_id):
+        """Queue the rows of one user, drawn from a per-user generator."""
+        rng = random.Random(f'{self.options["seed"]}:{index}')
+        objects = {}
+        for model, key in RELATIONS:
+            count = self.dist[f'{key}_per_user'].sample(rng)
+            objects[model] = names = _names(rng, model.__name__, count)
+            self.objects[model] += [(user_id, name) for name in names]
+
+        corpus = self.corpus
+        for i in range(self.dist['recipes_per_user'].sample(rng)):
+            length = min(
+                self.dist['description_length'].sample(rng), len(corpus)
+            )
+            start = rng.randrange(len(corpus) - length + 1)
+            cents = rng.randint(100, 99999)
+            links = {}
+            for model, key in RELATIONS:
+                count = self.dist[f'{key}_per_recipe'].sample(rng)
+                links[model] = sorted(rng.sample(
+                    range(len(objects[model])),
+                    min(count, len(objects[model])),
+                ))
+            self.recipes.append((
+                user_id,
+                f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}',
+                corpus[start:start + length].strip(),
+                rng.randint(5, 240),
+                f'{cents // 100}.{cents % 100:02d}',
+                f'https://example.com/recipes/{i}' if rng.random() < .5
+                else '',
+                links,
+            ))
+
+    def _flush(self):
+        """Load the queued rows in one transaction, return the row count."""
+        rows = 0
+        with transaction.atomic():
+            # Ids of the queued objects by user, in queued order.
+            object_ids = {}
+            for model, queued in self.objects.items():
+                ids = reserve_ids(model, len(queued)) if queued else []
+                rows += copy_rows(model, ['id', 'user_id', 'name'], (
+                    (obj_id, user_id, name)
+                    for obj_id, (user_id, name) in zip(ids, queued)
+                ))
+                by_user = object_ids[model] = {}
+                for obj_id, (user_id, _) in zip(ids, queued):
+                    by_user.setdefault(user_id, []).append(obj_id)
+
+            ids = reserve_ids(Recipe, len(self.recipes))
+            rows += copy_rows(Recipe, [
+                'id', 'user_id', 'title', 'description', 'time_minutes',
+                'price', 'link', 'image_variants',
+            ], (
+                (recipe_id, *recipe[:6], '{}')
+                for recipe_id, recipe in zip(ids, self.recipes)
+            ))
+            for model, field_name in RELATIONS:
+                field = Recipe._meta.get_field(field_name)
+                rows += copy_rows(
+                    field.remote_field.through,
+                    ['recipe_id', f'{field.m2m_reverse_field_name()}_id'],
+                    (
+                        (recipe_id, object_ids[model][recipe[0]][position])
+                        for recipe_id, recipe in zip(ids, self.recipes)
+                        for position in recipe[6][model]
+                    ),
+                )
+        self._reset()
+        return rows
+
+    def run(self, users):
+        """Generate the data of (index, user id) pairs, return counts."""
+        recipes = rows = 0
+        for index, user_id in users:
+            self._user(index, user_id)
+            if len(self.recipes) >= self.options['batch_size']:
+                recipes += len(self.recipes)
+                rows += self._flush()
+        if self.recipes or any(self.objects.values()):
+            recipes += len(self.recipes)
+            rows += self._flush()
+        return len(users), recipes, rows
+
+
+def _run_task(options, users):
+    """Generate users in a worker process."""
+    try:
+        return _Generator(options).run(users)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """Generate users with tags, ingredients and recipes.
+
+    Every user's data is drawn from a generator seeded with the seed and
+    the user's index, so the dataset does not depend on the batch size or
+    the number of workers. Rows are loaded with COPY, several users per
+    transaction, and workers generate disjoint sets of users in parallel.
+    Counts are given as N, MIN-MAX for a uniform range, or exp:MEAN for an
+    exponential distribution.
+    """
+    help = 'Generate a deterministic synthetic dataset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes-per-user', default='exp:100')
+        parser.add_argument('--tags-per-user', default='5-50')
+        parser.add_argument('--ingredients-per-user', default='20-200')
+        parser.add_argument('--tags-per-recipe', default='0-5')
+        parser.add_argument('--ingredients-per-recipe', default='3-12')
+        parser.add_argument('--description-length', default='0-2000')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--email-prefix', default='seed',
+            help='Users get emails PREFIX-SEED-INDEX@example.com.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Recipes loaded per transaction.',
+        )
+        parser.add_argument('--workers', type=int, default=1)
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        # Fails early on invalid distributions.
+        _Generator(options)
+        start = time.perf_counter()
+        users = self._create_users(options)
+        self.stdout.write(f'Created {len(users)} users.')
+
+        tasks = [
+            users[i:i + USERS_PER_TASK]
+            for i in range(0, len(users), USERS_PER_TASK)
+        ]
+        done = recipes = rows = 0
+        for result in self._results(options, tasks):
+            done += result[0]
+            recipes += result[1]
+            rows += result[2]
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{done}/{len(users)} users, {recipes} recipes '
+                f'({recipes / elapsed:.0f} recipes/s, '
+                f'{rows / elapsed:.0f} rows/s).'
+            )
+
+        # Gives the planner statistics for the new rows.
+        with connection.cursor() as cursor:
+            for model in (
+                Tag, Ingredient, Recipe,
+                Recipe.tags.through, Recipe.ingredients.through,
+            ):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users, {recipes} recipes and {rows} '
+            f'rows in {time.perf_counter() - start:.1f}s.'
+        ))
+
+    def _create_users(self, options):
+        """Create the users, return their (index, id) pairs."""
+        emails = [
+            f'{options["email_prefix"]}-{options["seed"]}-{i}@example.com'
+            for i in range(options['users'])
+        ]
+        model = get_user_model()
+        if model.objects.filter(email__in=emails[:1]).exists():
+            raise CommandError(
+                f'Users of seed {options["seed"]} with prefix '
+                f'{options["email_prefix"]!r} exist already.'
+            )
+        # Users cannot log in until a password is set.
+        password = make_password(None)
+        created = model.objects.bulk_create(
+            [model(email=email, password=password) for email in emails],
+            batch_size=options['batch_size'],
+        )
+        return [(i, user.id) for i, user in enumerate(created)]
+
+    def _results(self, options, tasks):
+        """Yield the counts of each task, run by the workers."""
+        if options['workers'] <= 1:
+            generator = _Generator(options)
+            for users in tasks:
+                yield generator.run(users)
+            return
+
+        task_options = {
+            key: options[key] for key in ('seed', 'batch_size', *DIST_KEYS)
+        }
+        # Forked workers must not share the parent's connection.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            options['workers'], mp_context=get_context('fork'),
+        ) as executor:
+            futures = [
+                executor.submit(_run_task, task_options, users)
+                for users in tasks
+            ]
+            for future in as_completed(futures):
+                yield future.result()
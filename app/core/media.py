@@ -0,0 +1,144 @@
+"""
+Serving of uploaded media files.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(header, size):
+    """Return the (start, end) of a single byte range header.
+
+    Returns None to serve the whole file, for missing, malformed or
+    multiple ranges, and raises ValueError for unsatisfiable ones.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    if size == 0:
+        # An empty file has no satisfiable range.
+        raise ValueError
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the final bytes of the file.
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    """Return whether a range request's If-Range validator is current."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, relative):
+    """Return a response handing the file to the front server, or None."""
+    mode = settings.MEDIA_SERVE_MODE
+    response = HttpResponse()
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(relative)
+        )
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        return None
+    # Lets the front server set the type from the file it serves.
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a media file with validators, byte ranges and offloading.
+
+    Conditional requests are answered here. The body is sent by the front
+    server when MEDIA_SERVE_MODE names an offload header, and otherwise by
+    FileResponse, which WSGI servers send with sendfile(2).
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        info = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('File not found.')
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('File not found.')
+
+    size, mtime = info.st_size, int(info.st_mtime)
+    etag = f'"{info.st_mtime_ns:x}-{size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=mtime,
+    )
+    if response is None:
+        response = _offload(fullpath, path)
+    if response is None:
+        try:
+            byte_range = _parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range and not _if_range_matches(request, etag, mtime):
+            byte_range = None
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(fullpath, start, end - start + 1), status=206,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+            content_type = mimetypes.guess_type(fullpath)[0]
+            response['Content-Type'] = (
+                content_type or 'application/octet-stream'
+            )
+        else:
+            response = FileResponse(open(fullpath, 'rb'))
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+    )
+    return response
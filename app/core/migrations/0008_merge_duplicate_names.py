@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:22
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for field_name in ['tags', 'ingredients']:
+        field = Recipe._meta.get_field(field_name)
+        model = field.related_model
+        through = field.remote_field.through
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        duplicates = model.objects.values('user_id', 'name').annotate(
+            keep_id=Min('id'), count=Count('id'),
+        ).filter(count__gt=1)
+        for group in duplicates.iterator():
+            ids = list(model.objects.filter(
+                user_id=group['user_id'], name=group['name'],
+            ).values_list('id', flat=True))
+            links = through.objects.filter(**{f'{target}__in': ids})
+            recipe_ids = set(links.values_list('recipe_id', flat=True))
+            links.delete()
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{target: group['keep_id']})
+                for recipe_id in recipe_ids
+            ])
+            model.objects.filter(id__in=ids).exclude(
+                id=group['keep_id']
+            ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recipe_image_content_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='recipe',
+            name='recipe_image_idx',
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('image__gt', '')), fields=['image'], name='recipe_image_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:29
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_recipe_image_pattern_index'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        # Word similarity costs microseconds a row, not an operator's
+        # default 1, which made filtering all of a user's names look
+        # cheaper than the trigram index.
+        migrations.RunSQL(
+            [
+                'ALTER FUNCTION word_similarity_op(text, text) COST 100',
+                'ALTER FUNCTION word_similarity_commutator_op(text, text) '
+                'COST 100',
+            ],
+            [
+                'ALTER FUNCTION word_similarity_op(text, text) COST 1',
+                'ALTER FUNCTION word_similarity_commutator_op(text, text) '
+                'COST 1',
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='ingredient',
+            name='ingredient_name_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='tag_name_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.GinIndex(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='ingredient_user_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='tag_user_name_trgm_idx'),
+        ),
+    ]
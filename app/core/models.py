@@ -5,13 +5,25 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import (
+    SearchVector,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
 from django.db import models
+from django.db.models import (
+    Count, Exists, F, OuterRef, Subquery, Value,
+)
+from django.db.models.functions import Cast, Coalesce, Collate, Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin
 )
 
+from core.storage import ContentAddressedStorage
+
 def recipe_image_file_path(instance, fileName):
     """Generate file path for new recipe image."""
     ext = os.path.splitext(fileName)[1]
@@ -51,6 +63,42 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = "email"
 
+class RecipeQuerySet(models.QuerySet):
+    """Queries for recipes."""
+
+    def _with_related(self, field_name, ids, match_all):
+        """Filter recipes linked to ids via semi-joins on the through table."""
+        field = self.model._meta.get_field(field_name)
+        through = field.remote_field.through
+        target = f'{field.m2m_reverse_field_name()}_id'
+        links = through.objects.filter(**{f'{target}__in': ids})
+
+        if match_all:
+            # Group once instead of joining the through table per id.
+            matching = links.values('recipe_id').annotate(
+                matched=Count(target),
+            ).filter(matched=len(set(ids))).values('recipe_id')
+            return self.filter(id__in=matching)
+
+        return self.filter(Exists(links.filter(recipe_id=OuterRef('pk'))))
+
+    def with_tags(self, tag_ids, match_all=False):
+        """Filter recipes with any (or all) of the tags."""
+        return self._with_related('tags', tag_ids, match_all)
+
+    def with_ingredients(self, ingredient_ids, match_all=False):
+        """Filter recipes with any (or all) of the ingredients."""
+        return self._with_related('ingredients', ingredient_ids, match_all)
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    """Manager for recipes."""
+
+    def get_queryset(self):
+        """Leave the search vector out of ordinary queries."""
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
     """Recipe object."""
     user = models.ForeignKey(
@@ -64,11 +112,119 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Stored once per distinct content; see recipe.images.release_image.
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage(),
+    )
+    # Storage names of the generated image variants, by variant name.
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Computed by the database on every write.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = RecipeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+            GinIndex(fields=['search_vector'], name='recipe_search_idx'),
+            # Counts the references to a stored image, and serves the
+            # prefix lookups of the gc_recipe_images command.
+            models.Index(
+                fields=['image'],
+                name='recipe_image_idx',
+                opclasses=['varchar_pattern_ops'],
+                condition=models.Q(image__gt=''),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+class RecipeAttrQuerySet(models.QuerySet):
+    """Queries for recipe attributes (tags and ingredients)."""
+
+    def _recipe_links(self):
+        """Return through rows linking the outer object to recipes."""
+        rel = self.model._meta.get_field('recipe')
+        target = rel.field.m2m_reverse_field_name()
+        links = rel.through.objects.filter(**{target: OuterRef('pk')})
+        return links, target
+
+    def assigned(self):
+        """Filter objects used by at least one recipe."""
+        links, _ = self._recipe_links()
+        return self.filter(Exists(links))
+
+    def with_recipe_count(self):
+        """Annotate the number of recipes using each object."""
+        links, target = self._recipe_links()
+        counts = links.order_by().values(target).annotate(
+            count=Count('pk'),
+        ).values('count')
+        return self.annotate(recipe_count=Coalesce(Subquery(counts), 0))
+
+    def owned_by(self, user):
+        """Filter objects of user.
+
+        The id is passed as a bigint: btree_gin has no int8 = int4
+        operator, so an integer parameter keeps the user out of the
+        (user, name) trigram index condition.
+        """
+        return self.filter(
+            user_id=Cast(Value(user.pk), models.BigIntegerField()),
+        )
+
+    def autocomplete(self, query, limit):
+        """Return up to limit names starting with query, then fuzzy matches.
+
+        Prefix matches come from a range scan of the (user, UPPER(name))
+        index in name order. Queries of three or more characters are topped
+        up with trigram word matches ordered by similarity.
+        """
+        term = query.upper()
+        matches = list(self.annotate(
+            key=Collate(Upper('name'), 'C'),
+        ).filter(key__startswith=term).order_by('key').values(
+            'id', 'name',
+        )[:limit])
+
+        if len(matches) < limit and len(term) >= 3:
+            fuzzy = self.annotate(key=Upper('name')).filter(
+                key__trigram_word_similar=term,
+            ).exclude(
+                id__in=[match['id'] for match in matches],
+            ).annotate(
+                similarity=TrigramWordSimilarity(term, F('key')),
+            ).order_by('-similarity', 'key').values('id', 'name')
+            matches += fuzzy[:limit - len(matches)]
+
+        return matches
+
+
+def autocomplete_indexes(prefix):
+    """Return the indexes serving RecipeAttrQuerySet.autocomplete."""
+    return [
+        models.Index(
+            F('user'), Collate(Upper('name'), 'C'),
+            name=f'{prefix}_name_prefix_idx',
+        ),
+        # Per user, with btree_gin, so fuzzy matches skip other users'.
+        GinIndex(
+            F('user'), OpClass(Upper('name'), name='gin_trgm_ops'),
+            name=f'{prefix}_user_name_trgm_idx',
+        ),
+    ]
+
+
 class Tag(models.Model):
     """Tag for filtering recipes."""
     name = models.CharField(max_length=250)
@@ -77,6 +233,20 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also serves per-user name lookups and -name ordering
+            # with index-only scans.
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                include=['id'],
+                name='unique_tag_user_name',
+            ),
+        ]
+        indexes = autocomplete_indexes('tag')
+
     def __str__(self):
         return self.name
 
@@ -88,5 +258,17 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                include=['id'],
+                name='unique_ingredient_user_name',
+            ),
+        ]
+        indexes = autocomplete_indexes('ingredient')
+
     def __str__(self):
         return self.name
\ No newline at end of file
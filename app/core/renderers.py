@@ -0,0 +1,70 @@
+"""
+Renderers for the APIs.
+"""
+import decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """Encode the types orjson leaves to Python like DRF's JSONEncoder."""
+    if isinstance(obj, decimal.Decimal):
+        value = float(obj)
+        # Python spells these in exponent notation differently from orjson,
+        # and the stock renderer rejects NaN and infinities.
+        if value and not 1e-4 <= abs(value) < 1e16:
+            raise ValueError('Render with the stock encoder.')
+        return value
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer using orjson when it is installed.
+
+    Strings, Decimals, dates and the other types DRF encodes come out byte
+    for byte as from JSONRenderer, and indented output and ASCII-only
+    settings are rendered by JSONRenderer. Floats are written by orjson
+    without a check, which would cost more than the rendering: values
+    are the same but exponents are spelled differently, 1e16 rather than
+    1e+16 and 0.00001 rather than 1e-05, and NaN and infinities render as
+    null instead of raising like the stock renderer with STRICT_JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        # Keep the output a strict javascript subset, like JSONRenderer.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
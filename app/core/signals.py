@@ -0,0 +1,23 @@
+"""
+Signal handlers for the core app.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token, invalidate_user
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Drop a token from the auth cache when it changes or is deleted."""
+    invalidate_token(instance.key)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_user(sender, instance, created=False, **kwargs):
+    """Drop a user's token from the auth cache when the user changes."""
+    # New users have no tokens yet.
+    if not created:
+        invalidate_user(instance.pk)
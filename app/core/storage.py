@@ -0,0 +1,70 @@
+"""
+Content-addressed file storage.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+
+
+def content_hash(content):
+    """Return the SHA-256 hex digest of a file's content.
+
+    Uploads hashed while streaming carry the digest as a sha256 attribute.
+    """
+    digest = getattr(content, 'sha256', None)
+    if digest is not None:
+        return digest
+
+    sha256 = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+def lock_content(*names):
+    """Serialize writers and releasers of stored files until commit.
+
+    Locks are per name without extension, which an original shares with
+    the variants named after it, so a stem can be locked on its own.
+    """
+    # Sorted, so concurrent callers take the locks in the same order.
+    keys = sorted({
+        int(hashlib.sha256(
+            os.path.splitext(name)[0].encode()
+        ).hexdigest()[:15], 16)
+        for name in names
+    })
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(key) FROM unnest(%s) AS key',
+            [keys],
+        )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the SHA-256 of their content.
+
+    Only the directory and extension of the requested name are kept, so
+    saving bytes that are already stored returns the existing file.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = content_hash(content)
+        directory, ext = os.path.split(name)[0], os.path.splitext(name)[1]
+        name = os.path.join(directory, digest[:2], digest + ext.lower())
+
+        lock_content(name)
+        if self.exists(name):
+            return name
+        saved = super().save(name, content, max_length)
+        if saved != name:
+            # Lost a race with another writer of the same bytes.
+            self.delete(saved)
+        return name
@@ -0,0 +1,100 @@
+"""
+Test utilities pinning the SQL queries of API requests.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.authentication import CachedTokenAuthentication, get_auth_cache
+
+# Maximum queries per request with a warm auth cache, by endpoint and
+# action. The budgets hold for any collection size, so a query per object
+# fails them.
+QUERY_BUDGETS = {
+    'recipe.list': 3,
+    'recipe.list_search': 3,
+    'recipe.retrieve': 3,
+    'recipe.create': 11,
+    'recipe.partial_update': 16,
+    'recipe.destroy': 6,
+    'recipe.bulk_create': 12,
+    'recipe.export': 3,
+    'tag.list': 1,
+    'tag.list_with_recipe_count': 1,
+    'tag.list_assigned_only': 1,
+    'tag.autocomplete': 2,
+    'tag.partial_update': 4,
+    'tag.destroy': 3,
+    'ingredient.list': 1,
+    'ingredient.list_with_recipe_count': 1,
+    'ingredient.list_assigned_only': 1,
+    'ingredient.autocomplete': 2,
+    'ingredient.partial_update': 4,
+    'ingredient.destroy': 3,
+    'user.create': 2,
+    'user.token': 5,
+    'user.me': 0,
+    'user.me_update': 2,
+}
+
+# Queries of a token lookup missing the auth cache.
+TOKEN_AUTH_QUERIES = 1
+
+
+def format_queries(queries):
+    """Return captured queries as numbered lines of SQL."""
+    return '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, 1)
+    )
+
+
+class QueryBudgetMixin:
+    """Assertions on the number of queries of requests, for test cases."""
+    budget_sizes = (1, 5, 20)
+    # Key of the token the client authenticates with, if any.
+    budget_token = None
+
+    def _prepare_auth_cache(self, state, token):
+        if state == 'cold':
+            get_auth_cache().clear()
+        elif state == 'warm':
+            CachedTokenAuthentication().authenticate_credentials(token)
+
+    def assertQueryBudget(self, key, request, populate=None, sizes=None):
+        """Assert request(size) stays within the budget of key.
+
+        populate(size), run before each request outside of the capture,
+        grows the data to size objects. The queries must not exceed the
+        budget at any size nor grow with the size. When the client uses
+        budget_token, every size is requested once with a cold auth cache,
+        allowed TOKEN_AUTH_QUERIES more, and once with a warm one.
+        """
+        budget = QUERY_BUDGETS[key]
+        token = self.budget_token
+        for state in ('cold', 'warm') if token else (None,):
+            limit = budget + TOKEN_AUTH_QUERIES if state == 'cold' else budget
+            counts = {}
+            for size in sizes or self.budget_sizes:
+                if populate:
+                    populate(size)
+                self._prepare_auth_cache(state, token)
+                with CaptureQueriesContext(connection) as context:
+                    response = request(size)
+                    # Streamed responses query while they are consumed.
+                    if getattr(response, 'streaming', False):
+                        b''.join(response.streaming_content)
+                self.assertLess(
+                    response.status_code, 400,
+                    f'{key} failed with {size} objects: '
+                    f'{response.status_code}',
+                )
+                count = len(context.captured_queries)
+                if count > limit or counts and count > min(counts.values()):
+                    cache = f' and a {state} auth cache' if state else ''
+                    before = f', by size before {counts}' if counts else ''
+                    self.fail(
+                        f'{key} ran {count} queries with {size} objects'
+                        f'{cache}, budget {limit}{before}:\n'
+                        f'{format_queries(context.captured_queries)}'
+                    )
+                counts[size] = count
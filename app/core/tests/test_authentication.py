@@ -0,0 +1,152 @@
+"""
+Tests for the cached token authentication.
+"""
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    get_auth_cache,
+    invalidate_user,
+    version_cache_key,
+)
+from core.checks import check_shared_caches
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test caching of token lookups."""
+
+    def setUp(self):
+        get_auth_cache().clear()
+        CachedTokenAuthentication.reset_stats()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_served_from_cache(self):
+        """Test the token lookup only hits the database once."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(
+            CachedTokenAuthentication.stats(), {'hits': 1, 'misses': 1}
+        )
+
+    def test_deleted_token_invalidated(self):
+        """Test deleting a token removes it from the cache immediately."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test deactivating a user removes their token from the cache."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changed_user_reloaded(self):
+        """Test changes to a user are visible on the next request."""
+        self.client.get(ME_URL)
+
+        self.user.name = 'New Name'
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+        self.assertEqual(CachedTokenAuthentication.stats()['misses'], 2)
+
+    def test_invalid_token_rejected(self):
+        """Test unknown tokens are rejected and not cached."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(get_auth_cache().get('auth:token:invalid'))
+        self.assertIsNone(get_auth_cache().get('auth:version:invalid'))
+
+    def test_evicted_version_is_a_miss(self):
+        """Test a token is reloaded once its version is evicted."""
+        self.client.get(ME_URL)
+        get_auth_cache().delete(version_cache_key(self.token.key))
+
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False,
+        )
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_read_before_invalidation_not_used(self):
+        """Test a token cached after an invalidation is not trusted."""
+        auth = CachedTokenAuthentication()
+        original = TokenAuthentication.authenticate_credentials
+
+        def invalidated_meanwhile(auth, key):
+            result = original(auth, key)
+            invalidate_user(self.user.pk)
+            return result
+
+        with patch.object(
+            TokenAuthentication, 'authenticate_credentials',
+            invalidated_meanwhile,
+        ):
+            auth.authenticate_credentials(self.token.key)
+
+        auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(
+            CachedTokenAuthentication.stats(), {'hits': 0, 'misses': 2}
+        )
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Test process local caches are rejected with several workers."""
+
+    def test_local_cache_with_one_worker_allowed(self):
+        with patch.dict(sys.modules, {'uwsgi': SimpleNamespace(numproc=1)}):
+            check_shared_caches(['TOKEN_AUTH_CACHE_ALIAS'])
+
+    def test_local_cache_with_several_workers_rejected(self):
+        with patch.dict(sys.modules, {'uwsgi': SimpleNamespace(numproc=4)}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_caches(['TOKEN_AUTH_CACHE_ALIAS'])
+
+    @override_settings(CACHES={
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }, TOKEN_AUTH_CACHE_ALIAS='shared')
+    def test_shared_cache_with_several_workers_allowed(self):
+        with patch.dict(sys.modules, {'uwsgi': SimpleNamespace(numproc=4)}):
+            check_shared_caches(['TOKEN_AUTH_CACHE_ALIAS'])
@@ -1,12 +1,26 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 
 from unittest.mock import patch
+from PIL import Image
 from psycopg2 import OperationalError as Psycopg2Error
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.management.commands.gc_recipe_images import (
+    Command as GCCommand,
+)
+from core.models import Ingredient, Recipe, Tag
 
 
 # Use @patch to replace the real Command.check method with a Mock object.
@@ -38,3 +52,368 @@ class CommandTest(SimpleTestCase):
         self.assertEqual(mocked_check.call_count, 6)
 
         mocked_check.assert_called_with(databases=['default'])
+
+
+class GCRecipeImagesTests(TestCase):
+    """Test the gc_recipe_images command."""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+
+    def _create_file(self, name):
+        """Create a media file and return its path."""
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * 10)
+        return path
+
+    def _reference(self, name):
+        Recipe.objects.create(
+            user=self.user, title='R', time_minutes=1, price=1, image=name,
+        )
+
+    def _gc(self, *args):
+        out = StringIO()
+        call_command('gc_recipe_images', '--min-age=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_orphans_deleted(self):
+        """Test unreferenced images and their variants are deleted."""
+        kept = self._create_file('uploads/recipe/aa/aa1.jpg')
+        kept_thumb = self._create_file('uploads/recipe/aa/aa1_thumb.jpg')
+        orphan = self._create_file('uploads/recipe/aa/aa2.png')
+        orphan_thumb = self._create_file('uploads/recipe/aa/aa2_thumb.jpg')
+        legacy = self._create_file('uploads/recipe/legacy.jpg')
+        self._reference('uploads/recipe/aa/aa1.jpg')
+
+        out = self._gc()
+
+        self.assertTrue(os.path.exists(kept))
+        self.assertTrue(os.path.exists(kept_thumb))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(orphan_thumb))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertIn('Found 3 orphans (30 bytes), deleted 3', out)
+
+    def test_reuploaded_content_kept(self):
+        """Test files referenced again after the scan are not deleted."""
+        original = self._create_file('uploads/recipe/aa/aa2.png')
+        thumb = self._create_file('uploads/recipe/aa/aa2_thumb.jpg')
+        command = GCCommand()
+        command.root = self.media_root
+        batch = [
+            (f'uploads/recipe/aa/{entry.name}', entry)
+            for entry in command._files('uploads/recipe/aa')
+        ]
+        orphans = command._orphans(batch)
+        self._reference('uploads/recipe/aa/aa2.png')
+
+        deleted = command._delete(orphans)
+
+        self.assertEqual(len(orphans), 2)
+        self.assertEqual(deleted, 0)
+        self.assertTrue(os.path.exists(original))
+        self.assertTrue(os.path.exists(thumb))
+
+    def test_dry_run_keeps_files(self):
+        """Test a dry run only reports orphans."""
+        orphan = self._create_file('uploads/recipe/aa/aa2.png')
+
+        out = self._gc('--dry-run')
+
+        self.assertTrue(os.path.exists(orphan))
+        self.assertIn('Found 1 orphans (10 bytes), deleted 0', out)
+
+    def test_recent_files_kept(self):
+        """Test files newer than the minimum age are kept."""
+        orphan = self._create_file('uploads/recipe/aa/aa2.png')
+
+        call_command('gc_recipe_images', stdout=StringIO())
+
+        self.assertTrue(os.path.exists(orphan))
+
+    def test_resumes_from_checkpoint(self):
+        """Test a run resumes after the checkpointed directory."""
+        done = self._create_file('uploads/recipe/aa/aa2.png')
+        pending = self._create_file('uploads/recipe/bb/bb2.png')
+        checkpoint = os.path.join(self.media_root, 'gc.json')
+        with open(checkpoint, 'w') as f:
+            json.dump({'directory': 'uploads/recipe/aa'}, f)
+
+        self._gc(f'--checkpoint={checkpoint}')
+
+        self.assertTrue(os.path.exists(done))
+        self.assertFalse(os.path.exists(pending))
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+class BackfillImageVariantsTests(TestCase):
+    """Test the backfill_image_variants command."""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+
+    def _recipe(self, name):
+        """Create a recipe with a stored image and no variants."""
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new('RGB', (400, 300)).save(path, format='JPEG')
+        return Recipe.objects.create(
+            user=self.user, title='R', time_minutes=1, price=1, image=name,
+        )
+
+    def test_missing_variants_generated(self):
+        """Test variants lost with their job are generated."""
+        recipe = self._recipe('uploads/recipe/aa/aa1.jpg')
+        out = StringIO()
+
+        call_command('backfill_image_variants', stdout=out)
+
+        recipe.refresh_from_db()
+        self.assertEqual(
+            set(recipe.image_variants), set(settings.RECIPE_IMAGE_VARIANTS)
+        )
+        for path in recipe.image_variants.values():
+            self.assertTrue(
+                os.path.exists(os.path.join(self.media_root, path))
+            )
+        self.assertIn('Found 1 images without variants', out.getvalue())
+
+    def test_recipes_without_image_skipped(self):
+        """Test recipes with an empty or NULL image are not reported."""
+        for image in ('', None):
+            Recipe.objects.create(
+                user=self.user, title='R', time_minutes=1, price=1,
+                image=image,
+            )
+        out = StringIO()
+
+        call_command('backfill_image_variants', stdout=out)
+
+        self.assertIn('Found 0 images without variants', out.getvalue())
+
+    def test_dry_run_generates_nothing(self):
+        """Test a dry run only reports the images without variants."""
+        recipe = self._recipe('uploads/recipe/aa/aa1.jpg')
+
+        call_command(
+            'backfill_image_variants', '--dry-run', stdout=StringIO(),
+        )
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, {})
+
+
+class ImportRecipesTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_recipes', path, *args, stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        """Test recipes and their relations are loaded from NDJSON."""
+        records = [
+            {
+                'title': 'Lemon pasta', 'description': 'Tangy\tand\nfresh',
+                'time_minutes': 15, 'price': '5.50',
+                'tags': [{'id': 1, 'name': 'Vegan'}, {'name': 'Quick'}],
+                'ingredients': ['Lemon', 'Pasta'],
+            },
+            {
+                'title': 'Toast', 'time_minutes': 2, 'price': 1,
+                'tags': ['Quick'], 'link': 'https://example.com',
+            },
+        ]
+        path = self._write('recipes.ndjson', '\n'.join(
+            json.dumps(record) for record in records
+        ))
+
+        out, _ = self._import(path, '--user=user@example.com')
+
+        self.assertIn('Imported 2 recipes and 5 links', out)
+        pasta = Recipe.objects.get(title='Lemon pasta')
+        self.assertEqual(pasta.description, 'Tangy\tand\nfresh')
+        self.assertEqual(pasta.price, Decimal('5.50'))
+        self.assertEqual(
+            sorted(pasta.tags.values_list('name', flat=True)),
+            ['Quick', 'Vegan'],
+        )
+        self.assertIn(self.tag, pasta.tags.all())
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Quick').count(), 1
+        )
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            list(Recipe.objects.filter(search_vector='tangy')), [pasta]
+        )
+        # New recipes take ids after the imported ones.
+        created = Recipe.objects.create(
+            user=self.user, title='New', time_minutes=1, price=1,
+        )
+        self.assertGreater(created.id, pasta.id)
+
+    def test_import_csv(self):
+        """Test recipes are loaded from CSV with per-row users."""
+        path = self._write('recipes.csv', (
+            'user,title,time_minutes,price,tags,ingredients\n'
+            'user@example.com,Soup,30,4.25,Vegan|Dinner,Leek|Potato\n'
+        ))
+
+        self._import(path)
+
+        soup = Recipe.objects.get(title='Soup', user=self.user)
+        self.assertEqual(soup.tags.count(), 2)
+        self.assertEqual(soup.ingredients.count(), 2)
+
+    def test_invalid_records_skipped(self):
+        """Test invalid records are reported and the rest imported."""
+        path = self._write('recipes.ndjson', '\n'.join([
+            '{"title": "Good", "time_minutes": 5, "price": "1.00"}',
+            '{"title": "", "time_minutes": 5, "price": "1.00"}',
+            '{"title": "Pricey", "time_minutes": 5, "price": "1000"}',
+            'not json',
+            '{"title": "Stranger", "time_minutes": 5, "price": "1.00", '
+            '"user": "nobody@example.com"}',
+            '{"title": "Long", "time_minutes": 2147483648, "price": "1"}',
+            '{"title": "Partial", "time_minutes": 3.9, "price": "1"}',
+            '{"title": "Nul\\u0000", "time_minutes": 5, "price": "1"}',
+            '{"title": "Tagged", "time_minutes": 5, "price": "1", '
+            '"tags": ["a\\u0000"]}',
+        ]))
+
+        out, err = self._import(path, '--user=user@example.com')
+
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)), ['Good']
+        )
+        self.assertIn('skipped 8 invalid records', out)
+        for number in range(2, 10):
+            self.assertIn(f'Record {number}:', err)
+        self.assertIn('time_minutes must be from 0 to 2147483647', err)
+        self.assertIn('time_minutes must be an integer', err)
+
+    def test_resumes_from_checkpoint(self):
+        """Test a run skips the checkpointed records, in batches."""
+        path = self._write('recipes.ndjson', '\n'.join(
+            json.dumps({'title': f'R{i}', 'time_minutes': 1, 'price': 1})
+            for i in range(1, 6)
+        ))
+        checkpoint = self._write('checkpoint.json', '{"records": 2}')
+
+        self._import(
+            path, '--user=user@example.com', '--batch-size=2',
+            f'--checkpoint={checkpoint}',
+        )
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            ['R3', 'R4', 'R5'],
+        )
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+class SeedDataTests(TestCase):
+    """Test the seed_data command."""
+
+    def _seed(self, *args):
+        call_command('seed_data', *args, stdout=StringIO())
+
+    def _dataset(self):
+        """Return the generated data without database ids."""
+        return [
+            (
+                recipe.user.email, recipe.title, recipe.description,
+                recipe.price, recipe.link,
+                sorted(tag.name for tag in recipe.tags.all()),
+                sorted(obj.name for obj in recipe.ingredients.all()),
+            )
+            for recipe in Recipe.objects.select_related('user')
+            .prefetch_related('tags', 'ingredients').order_by('id')
+        ]
+
+    def test_fixed_counts(self):
+        """Test fixed distributions generate exact counts."""
+        self._seed(
+            '--users=3', '--recipes-per-user=4', '--tags-per-user=5',
+            '--ingredients-per-user=2', '--tags-per-recipe=2',
+            '--ingredients-per-recipe=3', '--description-length=10-20',
+        )
+
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Tag.objects.count(), 15)
+        self.assertEqual(Recipe.objects.count(), 12)
+        self.assertEqual(Recipe.tags.through.objects.count(), 24)
+        # Fan-out is capped by the user's ingredients.
+        self.assertEqual(Recipe.ingredients.through.objects.count(), 24)
+        for recipe in Recipe.objects.all():
+            self.assertLessEqual(len(recipe.description), 20)
+            self.assertEqual(
+                {tag.user_id for tag in recipe.tags.all()}, {recipe.user_id}
+            )
+
+    def test_deterministic(self):
+        """Test a seed generates the same data for any batch size."""
+        args = ['--users=4', '--recipes-per-user=exp:5', '--seed=7']
+        self._seed(*args)
+        first = self._dataset()
+        get_user_model().objects.all().delete()
+
+        self._seed(*args, '--batch-size=3')
+
+        self.assertTrue(first)
+        self.assertEqual(self._dataset(), first)
+
+    def test_email_prefix(self):
+        """Test a seed can be generated again under another prefix."""
+        self._seed('--users=2', '--recipes-per-user=1')
+        with self.assertRaises(CommandError):
+            self._seed('--users=2', '--recipes-per-user=1')
+
+        self._seed('--users=2', '--recipes-per-user=1', '--email-prefix=b')
+
+        self.assertTrue(get_user_model().objects.filter(
+            email='b-0-1@example.com',
+        ).exists())
+
+    def test_invalid_distribution(self):
+        """Test invalid distributions are rejected before any write."""
+        with self.assertRaises(CommandError):
+            self._seed('--tags-per-recipe=lots')
+
+        self.assertFalse(get_user_model().objects.exists())
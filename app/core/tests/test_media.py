@@ -0,0 +1,136 @@
+"""
+Tests for serving media files.
+"""
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+
+def media_url(path):
+    """Create and return a media file URL."""
+    return reverse('media', args=[path])
+
+
+class MediaServingTests(TestCase):
+    """Test the media serving view."""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.path = os.path.join(media.name, 'uploads', 'image.jpg')
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b'0123456789')
+        self.url = media_url('uploads/image.jpg')
+
+    def test_serve_file(self):
+        """Test serving a whole file with validators."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'0123456789')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertIn('max-age=', res['Cache-Control'])
+
+    def test_if_none_match_not_modified(self):
+        """Test a matching If-None-Match returns 304."""
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_if_modified_since_not_modified(self):
+        """Test an up to date If-Modified-Since returns 304."""
+        since = http_date(os.stat(self.path).st_mtime)
+
+        res = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_byte_range(self):
+        """Test serving a byte range."""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), b'2345')
+        self.assertEqual(res['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(res['Content-Length'], '4')
+
+    def test_suffix_byte_range(self):
+        """Test serving the final bytes of a file."""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), b'789')
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file returns 416."""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */10')
+
+    def test_range_of_empty_file(self):
+        """Test any range of an empty file returns 416."""
+        open(self.path, 'wb').close()
+
+        for header in ('bytes=-10', 'bytes=0-'):
+            res = self.client.get(self.url, HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code, 416)
+            self.assertEqual(res['Content-Range'], 'bytes */0')
+
+    def test_stale_if_range_serves_whole_file(self):
+        """Test a range with a stale If-Range returns the whole file."""
+        res = self.client.get(
+            self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"',
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'0123456789')
+
+    @override_settings(
+        MEDIA_SERVE_MODE='x-accel-redirect',
+        MEDIA_ACCEL_REDIRECT_PREFIX='/protected/',
+    )
+    def test_accel_redirect_offload(self):
+        """Test offloading the body to the front server."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res['X-Accel-Redirect'], '/protected/uploads/image.jpg'
+        )
+        self.assertEqual(res.content, b'')
+        self.assertIn('ETag', res)
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_sendfile_offload(self):
+        """Test offloading with an X-Sendfile header."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res['X-Sendfile'], self.path)
+
+    def test_path_traversal_rejected(self):
+        """Test paths outside the media root are not served."""
+        res = self.client.get(media_url('../../etc/passwd'))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_missing_file(self):
+        """Test a missing file returns 404."""
+        res = self.client.get(media_url('uploads/missing.jpg'))
+
+        self.assertEqual(res.status_code, 404)
@@ -0,0 +1,127 @@
+"""
+Tests for the JSON renderer and parser.
+"""
+import datetime
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+PAYLOAD = {
+    'price': Decimal('5.50'),
+    'created': datetime.datetime(
+        2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+    ),
+    'local': datetime.datetime(
+        2024, 1, 2, 3, 4, 5,
+        tzinfo=datetime.timezone(datetime.timedelta(hours=2)),
+    ),
+    'day': datetime.date(2024, 1, 2),
+    'at': datetime.time(3, 4, 5, 678901),
+    'elapsed': datetime.timedelta(minutes=90),
+    'label': gettext_lazy('Recipe'),
+    'text': 'Crème brûlée \u2028\u2029 \U0001f600',
+    'ids': (1, 2, 3),
+    1: [None, True, 1.5, {'nested': []}],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer matches DRF's."""
+
+    def test_output_matches_json_renderer(self):
+        """Test decimals, datetimes and text render identically."""
+        expected = JSONRenderer().render(PAYLOAD)
+
+        with patch.object(JSONRenderer, 'render') as stock_render:
+            rendered = FastJSONRenderer().render(PAYLOAD)
+
+        stock_render.assert_not_called()
+        self.assertEqual(rendered, expected)
+
+    def test_exponent_decimals_match(self):
+        """Test decimals Python writes with an exponent render identically."""
+        for value in ('0.00001', '12345678901234567890'):
+            data = {'value': Decimal(value)}
+            self.assertEqual(
+                FastJSONRenderer().render(data),
+                JSONRenderer().render(data),
+            )
+
+    def test_float_values_match(self):
+        """Test floats keep their values, in orjson's spelling."""
+        data = [1.5, 1e16, 1.5e300, 0.00001]
+
+        rendered = FastJSONRenderer().render(data)
+
+        self.assertEqual(rendered, b'[1.5,1e16,1.5e300,0.00001]')
+        self.assertEqual(
+            json.loads(rendered), json.loads(JSONRenderer().render(data))
+        )
+
+    def test_non_finite_floats_render_null(self):
+        """Test NaN and infinities render as null, unlike the stock one."""
+        data = [float('nan'), float('inf')]
+
+        self.assertEqual(FastJSONRenderer().render(data), b'[null,null]')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_indented_output_matches(self):
+        """Test indented output is rendered by the stock renderer."""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type),
+        )
+
+    def test_none_renders_empty(self):
+        """Test rendering None returns no content."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    @patch('core.renderers.orjson', None)
+    def test_falls_back_without_orjson(self):
+        """Test rendering without orjson installed."""
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD),
+            JSONRenderer().render(PAYLOAD),
+        )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the orjson parser matches DRF's."""
+
+    def _parse(self, parser, content):
+        return parser.parse(io.BytesIO(content))
+
+    def test_parse(self):
+        """Test parsing a JSON body."""
+        content = '{"title": "Crème", "price": "5.50", "tags": [1, 2]}'
+
+        self.assertEqual(
+            self._parse(FastJSONParser(), content.encode()),
+            self._parse(JSONParser(), content.encode()),
+        )
+
+    def test_invalid_json_rejected(self):
+        """Test invalid bodies raise the stock parse error."""
+        for content in (b'{"title":', b'NaN'):
+            with self.assertRaises(ParseError) as fast:
+                self._parse(FastJSONParser(), content)
+            with self.assertRaises(ParseError) as stock:
+                self._parse(JSONParser(), content)
+            self.assertEqual(str(fast.exception), str(stock.exception))
+
+    @patch('core.parsers.orjson', None)
+    def test_falls_back_without_orjson(self):
+        """Test parsing without orjson installed."""
+        self.assertEqual(self._parse(FastJSONParser(), b'[1, 2]'), [1, 2])
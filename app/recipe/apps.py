@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        from recipe import signals  # noqa: F401
+        from core.checks import check_shared_caches
+        check_shared_caches(['RECIPE_LIST_CACHE_ALIAS'])
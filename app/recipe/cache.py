@@ -0,0 +1,118 @@
+"""
+Per-user caching of the recipe API list responses.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def get_list_cache():
+    """Return the cache holding list responses."""
+    return caches[settings.RECIPE_LIST_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'recipe:list-version:{user_id}'
+
+
+def _new_version(user_id):
+    get_list_cache().set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def get_user_version(user_id):
+    """Return the current cache version of a user's lists."""
+    cache = get_list_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def invalidate_user_lists(user_id):
+    """Invalidate all cached lists of a user."""
+    _new_version(user_id)
+    # Drop anything cached from data read before the write committed.
+    transaction.on_commit(lambda: _new_version(user_id))
+
+
+def list_cache_key(request, basename):
+    """Return the cache key for a list request."""
+    # Pagination links are absolute, so the host is part of the key.
+    params = (request.get_host(), sorted(request.query_params.lists()))
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()
+    version = get_user_version(request.user.pk)
+    return f'recipe:list:{request.user.pk}:{version}:{basename}:{digest}'
+
+
+def _etag_content(data):
+    """Return the data encoded deterministically, as bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data, default=_encoder.default, option=orjson.OPT_SORT_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+
+
+def make_etag(data):
+    """Return a weak ETag for response data.
+
+    The tag only has to change with the data, so the encoding need not
+    match the rendered body.
+    """
+    return f'W/"{hashlib.sha1(_etag_content(data)).hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    """Return whether the request's If-None-Match matches an ETag."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag.removeprefix('W/') in [
+        tag.removeprefix('W/') for tag in etags
+    ]
+
+
+class CachedListMixin:
+    """Serve list responses from a per-user cache with ETag support."""
+
+    def list(self, request, *args, **kwargs):
+        cache = get_list_cache()
+        key = list_cache_key(request, self.basename)
+        cached = cache.get(key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            etag = make_etag(response.data)
+            cache.set(
+                key, (etag, response.data), settings.RECIPE_LIST_CACHE_TTL
+            )
+        else:
+            etag, data = cached
+            response = Response(data)
+
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
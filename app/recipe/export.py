@@ -0,0 +1,49 @@
+"""
+Streaming NDJSON export of recipes.
+"""
+import itertools
+
+from django.conf import settings
+
+from core.renderers import FastJSONRenderer
+from recipe.fastpath import get_reader
+
+
+# Rows in the first chunk, kept small so the response starts at once.
+FIRST_CHUNK_SIZE = 100
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    chunk_size = min(size, FIRST_CHUNK_SIZE)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+        chunk_size = size
+
+
+def _serialized_chunks(queryset, serializer_class, context, chunk_size):
+    """Yield the serialized data of queryset, one list per chunk."""
+    if settings.RECIPE_FAST_READ_PATH:
+        reader = get_reader(serializer_class)
+        rows = reader.rows(queryset).iterator(chunk_size=chunk_size)
+        for chunk in _chunks(rows, chunk_size):
+            yield reader.serialize(chunk, context['request'])
+    else:
+        # Prefetches the relations once per chunk.
+        instances = queryset.iterator(chunk_size=chunk_size)
+        for chunk in _chunks(instances, chunk_size):
+            yield serializer_class(chunk, many=True, context=context).data
+
+
+def ndjson_export(queryset, serializer_class, context, chunk_size=None):
+    """Yield queryset serialized as NDJSON, one write per chunk.
+
+    Rows are read through a server-side cursor, so memory use depends on
+    the chunk size rather than on the number of recipes.
+    """
+    chunk_size = chunk_size or settings.RECIPE_EXPORT_CHUNK_SIZE
+    renderer = FastJSONRenderer()
+    for data in _serialized_chunks(
+        queryset, serializer_class, context, chunk_size
+    ):
+        yield b''.join(renderer.render(item) + b'\n' for item in data)
@@ -0,0 +1,162 @@
+"""
+Generation of resized recipe image variants.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+from core.storage import lock_content
+from recipe.cache import invalidate_user_lists
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _image_storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def render_variants(name, storage=default_storage):
+    """Save the configured variants of a stored image, return their names.
+
+    Variants are named after the original, which is stored once per
+    content, so variants that already exist are reused.
+    """
+    specs = settings.RECIPE_IMAGE_VARIANTS
+    stem = os.path.splitext(name)[0]
+    variants = {
+        variant: f'{stem}_{variant}{EXTENSIONS[spec["format"]]}'
+        for variant, spec in specs.items()
+    }
+    missing = [
+        variant for variant, path in variants.items()
+        if not storage.exists(path)
+    ]
+    if not missing:
+        return variants
+
+    largest = max(max(specs[variant]['size']) for variant in missing)
+    with _image_storage().open(name) as original, \
+            Image.open(original) as image:
+        # Lets the JPEG decoder downscale while decoding.
+        image.draft(image.mode, (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        for variant in missing:
+            spec = specs[variant]
+            resized = image.copy()
+            resized.thumbnail(spec['size'], Image.Resampling.LANCZOS)
+            if spec['format'] == 'JPEG' and resized.mode not in ('RGB', 'L'):
+                resized = resized.convert('RGB')
+
+            content = io.BytesIO()
+            resized.save(
+                content, format=spec['format'], quality=spec['quality']
+            )
+            path = variants[variant]
+            saved = storage.save(path, ContentFile(content.getvalue()))
+            if saved != path:
+                # Another worker rendered the same variant meanwhile.
+                storage.delete(saved)
+    return variants
+
+
+def release_images(names, variants=None):
+    """Delete the stored images among names that no recipe uses.
+
+    variants maps names to the paths of their variants, deleted along with
+    them under the same content lock. Returns the names of the deleted
+    images.
+    """
+    variants = variants or {}
+    with transaction.atomic():
+        lock_content(*names)
+        referenced = set(Recipe.objects.filter(
+            image__in=names,
+        ).values_list('image', flat=True))
+        released = [name for name in names if name not in referenced]
+        for name in released:
+            _image_storage().delete(name)
+            for path in variants.get(name, ()):
+                default_storage.delete(path)
+    return released
+
+
+def release_image(name, variants=()):
+    """Delete a stored image and its variants unless a recipe uses it."""
+    if name:
+        release_images([name], {name: variants})
+
+
+def generate_variants(recipe_id, user_id, name):
+    """Generate the variants of a recipe image and record them."""
+    current = Recipe.objects.filter(pk=recipe_id, image=name)
+    if not current.exists():
+        # Superseded before the job started.
+        return
+    variants = render_variants(name)
+    updated = current.update(image_variants=variants)
+    if not updated:
+        # The image was replaced or removed while rendering.
+        release_image(name, variants.values())
+        return
+    invalidate_user_lists(user_id)
+
+
+def _run(recipe_id, user_id, name):
+    try:
+        generate_variants(recipe_id, user_id, name)
+    except Exception:
+        logger.exception('Generating variants of %s failed.', name)
+    finally:
+        close_old_connections()
+        _slots.release()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _slots = threading.BoundedSemaphore(
+                settings.RECIPE_IMAGE_WORKERS + settings.RECIPE_IMAGE_QUEUE_MAX
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image',
+            )
+    return _executor
+
+
+def schedule_variants(recipe):
+    """Generate a recipe's image variants once the transaction commits.
+
+    Work runs in a bounded thread pool; when its queue is full the caller
+    blocks until a slot frees up. Jobs do not survive the process, the
+    backfill_image_variants command generates those that were lost.
+    """
+    if not recipe.image:
+        return
+    args = (recipe.pk, recipe.user_id, recipe.image.name)
+
+    def submit():
+        if not settings.RECIPE_IMAGE_ASYNC:
+            generate_variants(*args)
+            return
+        executor = _get_executor()
+        _slots.acquire()
+        executor.submit(_run, *args)
+
+    transaction.on_commit(submit)
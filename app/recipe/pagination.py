@@ -0,0 +1,30 @@
+"""
+Pagination for the recipe APIs.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """Opaque cursor pagination with a client selectable page size."""
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        """Use the view's ordering for this request if it sets one."""
+        get_view_ordering = getattr(view, 'get_pagination_ordering', None)
+        ordering = get_view_ordering() if get_view_ordering else None
+        return ordering or super().get_ordering(request, queryset, view)
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginate recipes newest first, keyed on id."""
+    ordering = '-id'
+
+
+class NameCursorPagination(BaseCursorPagination):
+    """Paginate tags and ingredients by name, keyed on name."""
+    ordering = '-name'
@@ -1,6 +1,10 @@
 """
 Serializers for recipe APIs
 """
+from django.core.files.storage import default_storage
+from django.db import transaction
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from core.models import Recipe, Tag, Ingredient
@@ -21,30 +25,166 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for ingredients with their recipe count."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+
+
+class TagCountSerializer(TagSerializer):
+    """Serializer for tags with their recipe count."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer for creating many recipes at once."""
+
+    def _through_rows(self, field_name, recipes, items, objs):
+        """Build through rows linking each recipe to its named objects."""
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        rows = [
+            through(**{
+                field.m2m_field_name(): recipe,
+                field.m2m_reverse_field_name(): objs[name],
+            })
+            for recipe, recipe_items in zip(recipes, items)
+            for name in dict.fromkeys(item['name'] for item in recipe_items)
+        ]
+        return through, rows
+
+    def _objects_by_name(self, model, items):
+        """Resolve the names used across all recipes in one pass."""
+        flat = [item for recipe_items in items for item in recipe_items]
+        return {
+            obj.name: obj
+            for obj in self.child._get_or_create_objects(model, flat)
+        }
+
+    def create(self, validated_data):
+        """Create recipes with bulk inserts for rows and relations."""
+        tags = [attrs.pop('tags', []) for attrs in validated_data]
+        ingredients = [
+            attrs.pop('ingredients', []) for attrs in validated_data
+        ]
+
+        with transaction.atomic():
+            tag_objs = self._objects_by_name(Tag, tags)
+            ingredient_objs = self._objects_by_name(Ingredient, ingredients)
+            recipes = Recipe.objects.bulk_create(
+                [Recipe(**attrs) for attrs in validated_data]
+            )
+            for field_name, items, objs in [
+                ('tags', tags, tag_objs),
+                ('ingredients', ingredients, ingredient_objs),
+            ]:
+                through, rows = self._through_rows(
+                    field_name, recipes, items, objs
+                )
+                through.objects.bulk_create(rows)
+
+        return recipes
+
+
+def variant_urls(variants, request=None):
+    """Return the URLs of image variants, by variant name."""
+    urls = {}
+    for variant, name in variants.items():
+        url = default_storage.url(name)
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the generated image variants, by variant name."""
+
+    def to_representation(self, value):
+        return variant_urls(value, self.context.get('request'))
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for the recipe"""
 
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ["id", "title", "time_minutes", "price", "link", "tags", "ingredients"]
+        fields = [
+            "id", "title", "time_minutes", "price", "link", "tags",
+            "ingredients", "image_variants",
+        ]
         read_only_fields = ["id"]
+        list_serializer_class = RecipeListSerializer
+
+    def get_fields(self):
+        """Return the fields, limited to those selected in the context."""
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        if selected is None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in selected
+        }
+
+    def _get_or_create_objects(self, model, items):
+        """Return objects matching items by name, bulk creating new ones."""
+        auth_user = self.context['request'].user
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
+
+        objs = {
+            obj.name: obj
+            for obj in model.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [
+            model(user=auth_user, name=name)
+            for name in names if name not in objs
+        ]
+        # Upsert so names inserted by a concurrent writer are returned too.
+        created = model.objects.bulk_create(
+            missing,
+            update_conflicts=True,
+            unique_fields=['user', 'name'],
+            update_fields=['name'],
+        )
+        for obj in created:
+            objs[obj.name] = obj
+
+        return [objs[name] for name in names]
 
     def _get_or_create_tag(self, tags, recipe):
         """Handle getting or creating tags as needed."""
-        auth_user = self.context['request'].user
-        for tag_data in tags:
-           tag_obj, created = Tag.objects.get_or_create(user=auth_user, **tag_data)
-           recipe.tags.add(tag_obj)
+        tag_objs = self._get_or_create_objects(Tag, tags)
+        if tag_objs:
+            recipe.tags.add(*tag_objs)
 
     def _get_or_create_ingredient(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
-        auth_user = self.context['request'].user
-        for ingredient_data in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(user=auth_user, **ingredient_data)
-            recipe.ingredients.add(ingredient_obj)
+        ingredient_objs = self._get_or_create_objects(Ingredient, ingredients)
+        if ingredient_objs:
+            recipe.ingredients.add(*ingredient_objs)
+
+    def _update_related(self, manager, objs):
+        """Change a recipe relation to objs, writing only the changed rows."""
+        current_ids = {obj.id for obj in manager.all()}
+        wanted_ids = {obj.id for obj in objs}
+
+        removed_ids = current_ids - wanted_ids
+        if removed_ids:
+            manager.remove(*removed_ids)
+
+        added = [obj for obj in objs if obj.id not in current_ids]
+        if added:
+            manager.add(*added)
 
     def create(self, validated_data):
         """Create a recipe"""
@@ -64,12 +204,15 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', None) # "Give me the tags if you have them. If not, give me 'Nothing'."
         ingredients = validated_data.pop('ingredients', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tag(tags, instance)
+            self._update_related(
+                instance.tags, self._get_or_create_objects(Tag, tags)
+            )
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredient(ingredients, instance)
+            self._update_related(
+                instance.ingredients,
+                self._get_or_create_objects(Ingredient, ingredients),
+            )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -82,12 +225,16 @@ class RecipeDetailSerializer(RecipeSerializer):
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ["description", "image"]
+        # Images are only written through upload-image, which enforces the
+        # size limits.
+        extra_kwargs = {'image': {'read_only': True}}
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Seralizer for uploading images to recipe."""
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_variants']
         read_only_fields = ['id']
         extra_kwargs = {'image' :{'required':'True'}}
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Signal handlers for the recipe app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import invalidate_user_lists
+from recipe.images import release_image
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_on_change(sender, instance, **kwargs):
+    """Invalidate the owner's cached lists when an object changes."""
+    invalidate_user_lists(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_on_m2m_change(sender, instance, action, **kwargs):
+    """Invalidate the owner's cached lists when recipe relations change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_user_lists(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image_on_delete(sender, instance, **kwargs):
+    """Release a deleted recipe's image once the deletion commits."""
+    name = instance.image.name
+    variants = list(instance.image_variants.values())
+    transaction.on_commit(lambda: release_image(name, variants))
@@ -0,0 +1,124 @@
+"""
+Tests for the compiled recipe read path.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import get_list_cache
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class FastReadPathParityTests(TestCase):
+    """Test the fast read path matches the serializers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dinner', 'Quick']
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ['Salt', 'Pâte', 'Lemon']
+        ]
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Lemon pasta {i}',
+                description='Fresh lemon and pasta.' if i % 2 else '',
+                time_minutes=10 + i,
+                price=Decimal('5.5') + i,
+                link='https://example.com/recipe.pdf' if i % 2 else '',
+            )
+            recipe.tags.add(*tags[i % 3:])
+            recipe.ingredients.add(*reversed(ingredients[:i]))
+        recipe.image = 'uploads/recipe/ab/abc.jpg'
+        recipe.image_variants = {'thumb': 'uploads/recipe/ab/abc_thumb.jpg'}
+        recipe.save()
+        self.recipe = recipe
+
+    def _get_both(self, url, params=None):
+        """Return the responses of the fast and the serializer paths."""
+        responses = []
+        for fast in (True, False):
+            get_list_cache().clear()
+            with override_settings(RECIPE_FAST_READ_PATH=fast):
+                responses.append(self.client.get(url, params))
+        return responses
+
+    def test_list_parity(self):
+        """Test list pages are identical."""
+        fast, slow = self._get_both(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(len(fast.data['results']), 2)
+
+    def test_next_page_parity(self):
+        """Test following a cursor gives identical pages."""
+        first, _ = self._get_both(RECIPE_URL, {'page_size': 2})
+
+        fast, slow = self._get_both(first.data['next'])
+
+        self.assertEqual(fast.content, slow.content)
+
+    def test_filtered_search_parity(self):
+        """Test filtered and searched lists are identical."""
+        tag = Tag.objects.get(name='Quick')
+        params = {'tags': str(tag.id), 'search': 'lemon'}
+
+        fast, slow = self._get_both(RECIPE_URL, params)
+
+        self.assertEqual(fast.content, slow.content)
+        self.assertTrue(fast.data['results'])
+
+    def test_detail_parity(self):
+        """Test recipe details are identical."""
+        fast, slow = self._get_both(detail_url(self.recipe.id))
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        self.assertIn('image', fast.data)
+
+    def test_sparse_fields_parity(self):
+        """Test narrowed lists and details are identical."""
+        for url, params in [
+            (RECIPE_URL, {'fields': 'title,tags,price'}),
+            (detail_url(self.recipe.id), {'omit': 'ingredients,image'}),
+        ]:
+            with self.subTest(url=url, params=params):
+                fast, slow = self._get_both(url, params)
+
+                self.assertEqual(fast.status_code, status.HTTP_200_OK)
+                self.assertEqual(fast.content, slow.content)
+
+    def test_other_users_recipe_not_found(self):
+        """Test the fast path only returns the user's recipes."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123',
+        )
+        recipe = Recipe.objects.create(
+            user=other, title='Other', time_minutes=5, price=Decimal('1.00'),
+        )
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -14,6 +14,7 @@ from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 def create_user(email='user@example.com', password='testpass123'):
     """Create and return a new user."""
@@ -56,7 +57,7 @@ class PrivateIngredientAPITest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test list of ingredients is limited to authenticated user."""
@@ -69,9 +70,9 @@ class PrivateIngredientAPITest(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
-        self.assertEqual(res.data[0]['id'], ingredient.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
+        self.assertEqual(res.data['results'][0]['id'], ingredient.id)
 
     def test_update_ingredient(self):
         """Test updating a ingredient."""
@@ -117,8 +118,28 @@ class PrivateIngredientAPITest(TestCase):
         s1 = IngredientSerializer(in1)
         s2 = IngredientSerializer(in2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
+
+    def test_assigned_ingredients_with_recipe_count(self):
+        """Test assigned_only combined with recipe counts."""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Saffron')
+        recipe = Recipe.objects.create(
+            title='Chips',
+            time_minutes=15,
+            price=Decimal('3.00'),
+            user=self.user,
+        )
+        recipe.ingredients.add(salt)
+
+        params = {'assigned_only': 1, 'with_recipe_count': 1}
+        res = self.client.get(INGREDIENTS_URL, params)
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': salt.id, 'name': 'Salt', 'recipe_count': 1}],
+        )
 
     def test_filtered_ingredients_unique(self):
         """Test filtered ingredients returns a unqiue list."""
@@ -143,4 +164,40 @@ class PrivateIngredientAPITest(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only':1})
 
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_autocomplete_ingredients(self):
+        """Test autocomplete returns prefix matches before fuzzy ones."""
+        for name in [
+            'Tomato', 'Tomatillo', 'Potato', 'Basil', 'Sun Dried Tomatoes',
+        ]:
+            Ingredient.objects.create(user=self.user, name=name)
+        other_user = create_user(email='other@example.com')
+        Ingredient.objects.create(user=other_user, name='Tomato Paste')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'toma'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [item['name'] for item in res.data]
+        self.assertEqual(names[:2], ['Tomatillo', 'Tomato'])
+        self.assertIn('Sun Dried Tomatoes', names)
+        self.assertNotIn('Basil', names)
+        self.assertNotIn('Tomato Paste', names)
+        self.assertEqual(set(res.data[0]), {'id', 'name'})
+
+    def test_autocomplete_ingredients_fuzzy(self):
+        """Test autocomplete tolerates typos."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Cilantro')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'cilantor'})
+
+        self.assertEqual(res.data, [{'id': ingredient.id, 'name': 'Cilantro'}])
+
+    def test_autocomplete_ingredients_limit(self):
+        """Test autocomplete returns at most limit matches."""
+        for i in range(5):
+            Ingredient.objects.create(user=self.user, name=f'Pepper {i}')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pep', 'limit': 3})
+
+        self.assertEqual(len(res.data), 3)
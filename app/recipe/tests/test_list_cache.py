@@ -0,0 +1,149 @@
+"""
+Tests for the per-user list response cache.
+"""
+import sys
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.checks import check_shared_caches
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import get_list_cache, make_etag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ListCacheTests(TestCase):
+    """Test caching of list responses."""
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Test a repeated list request does not query the database."""
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test a matching If-None-Match returns 304 without queries."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(res.content)
+
+    def test_write_invalidates_list(self):
+        """Test creating a recipe through the API invalidates the list."""
+        res = self.client.get(RECIPE_URL)
+        etag = res['ETag']
+
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '1.00'}
+        self.client.post(RECIPE_URL, payload)
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_m2m_change_invalidates_assigned_only(self):
+        """Test assigning an ingredient invalidates filtered lists."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe = create_recipe(user=self.user)
+        params = {'assigned_only': 1}
+        res = self.client.get(INGREDIENTS_URL, params)
+        self.assertEqual(res.data['results'], [])
+
+        recipe.ingredients.add(ingredient)
+        res = self.client.get(INGREDIENTS_URL, params)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_query_params_cached_separately(self):
+        """Test different query params are cached under different keys."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        create_recipe(user=self.user, title='Other')
+
+        all_res = self.client.get(RECIPE_URL)
+        filtered = self.client.get(RECIPE_URL, {'tags': str(tag.id)})
+
+        self.assertEqual(len(all_res.data['results']), 2)
+        self.assertEqual(len(filtered.data['results']), 1)
+
+    def test_cache_limited_to_user(self):
+        """Test cached lists are not shared between users."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        other = create_user(email='other@example.com')
+        self.client.force_authenticate(other)
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_local_cache_rejected_with_several_workers(self):
+        """Test a process local list cache fails with several workers."""
+        with patch.dict(sys.modules, {'uwsgi': SimpleNamespace(numproc=4)}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_caches(['RECIPE_LIST_CACHE_ALIAS'])
+
+
+class MakeETagTests(SimpleTestCase):
+    """Test ETags of response data."""
+
+    def assertETagFollowsData(self):
+        data = [{'id': 1, 'price': Decimal('5.00'), 'title': 'Soup'}]
+        reordered = [{'title': 'Soup', 'price': Decimal('5.00'), 'id': 1}]
+        changed = [{'id': 1, 'price': Decimal('5.50'), 'title': 'Soup'}]
+
+        self.assertEqual(make_etag(data), make_etag(reordered))
+        self.assertNotEqual(make_etag(data), make_etag(changed))
+
+    def test_etag_follows_data(self):
+        """Test ETags ignore key order and change with the data."""
+        self.assertETagFollowsData()
+
+    def test_etag_without_orjson(self):
+        """Test ETags are computed by the stdlib without orjson."""
+        with patch('recipe.cache.orjson', None):
+            self.assertETagFollowsData()
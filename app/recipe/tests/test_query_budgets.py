@@ -0,0 +1,265 @@
+"""
+Tests pinning the queries of the recipe APIs to their budgets.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from core.testing import QueryBudgetMixin
+from recipe.cache import get_list_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_CREATE_URL = reverse('recipe:recipe-bulk-create')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(size, prefix='Recipe'):
+    """Return a recipe payload with size new tags and ingredients."""
+    return {
+        'title': f'{prefix} with {size} items',
+        'time_minutes': 10,
+        'price': '5.00',
+        'tags': [{'name': f'{prefix} tag {i}'} for i in range(size)],
+        'ingredients': [
+            {'name': f'{prefix} ingredient {i}'} for i in range(size)
+        ],
+    }
+
+
+class BudgetTestCase(QueryBudgetMixin, TestCase):
+    """Token authenticated client with helpers growing the user's data."""
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.budget_token = Token.objects.create(user=self.user).key
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.budget_token}',
+        )
+
+    def grow_recipes(self, size):
+        """Give the user size recipes, each with a tag and an ingredient."""
+        for i in range(Recipe.objects.filter(user=self.user).count(), size):
+            recipe = create_recipe(self.user, title=f'Recipe {i}')
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'T{i}'))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'I{i}')
+            )
+        get_list_cache().clear()
+
+    def grow_relations(self, recipe, size):
+        """Give recipe size tags and size ingredients."""
+        for model, related in (
+            (Tag, recipe.tags), (Ingredient, recipe.ingredients),
+        ):
+            for i in range(related.count(), size):
+                related.add(model.objects.create(
+                    user=self.user, name=f'{recipe.id} {model.__name__} {i}',
+                ))
+
+
+class RecipeQueryBudgetTests(BudgetTestCase):
+    """Test the recipe API stays within its query budgets."""
+
+    def test_list(self):
+        self.assertQueryBudget(
+            'recipe.list',
+            lambda size: self.client.get(RECIPES_URL),
+            self.grow_recipes,
+        )
+
+    @override_settings(RECIPE_FAST_READ_PATH=False)
+    def test_list_serializer_path(self):
+        self.assertQueryBudget(
+            'recipe.list',
+            lambda size: self.client.get(RECIPES_URL),
+            self.grow_recipes,
+        )
+
+    def test_list_search(self):
+        self.assertQueryBudget(
+            'recipe.list_search',
+            lambda size: self.client.get(RECIPES_URL, {'search': 'recipe'}),
+            self.grow_recipes,
+        )
+
+    def test_retrieve(self):
+        recipe = create_recipe(self.user)
+        self.assertQueryBudget(
+            'recipe.retrieve',
+            lambda size: self.client.get(
+                reverse('recipe:recipe-detail', args=[recipe.id])
+            ),
+            lambda size: self.grow_relations(recipe, size),
+        )
+
+    def test_create(self):
+        self.assertQueryBudget(
+            'recipe.create',
+            lambda size: self.client.post(
+                RECIPES_URL, recipe_payload(size, f'New {size}'),
+                format='json',
+            ),
+        )
+
+    def test_partial_update(self):
+        recipe = create_recipe(self.user)
+        self.grow_relations(recipe, 3)
+        self.assertQueryBudget(
+            'recipe.partial_update',
+            lambda size: self.client.patch(
+                reverse('recipe:recipe-detail', args=[recipe.id]),
+                recipe_payload(size, f'Updated {size}'),
+                format='json',
+            ),
+        )
+
+    def test_destroy(self):
+        recipes = {}
+
+        def populate(size):
+            recipes[size] = create_recipe(self.user)
+            self.grow_relations(recipes[size], size)
+
+        self.assertQueryBudget(
+            'recipe.destroy',
+            lambda size: self.client.delete(
+                reverse('recipe:recipe-detail', args=[recipes[size].id])
+            ),
+            populate,
+        )
+
+    def test_bulk_create(self):
+        self.assertQueryBudget(
+            'recipe.bulk_create',
+            lambda size: self.client.post(
+                BULK_CREATE_URL,
+                [recipe_payload(2, f'Bulk {size} {i}') for i in range(size)],
+                format='json',
+            ),
+        )
+
+    def test_export(self):
+        self.assertQueryBudget(
+            'recipe.export',
+            lambda size: self.client.get(EXPORT_URL),
+            self.grow_recipes,
+        )
+
+
+class AttrQueryBudgetTests:
+    """Query budget tests shared by tags and ingredients."""
+    model = None
+    name = None
+
+    def url(self, suffix, *args):
+        return reverse(f'recipe:{self.name}-{suffix}', args=args)
+
+    def grow_objects(self, size):
+        """Give the user size objects, each assigned to its own recipe."""
+        objects = self.model.objects.filter(user=self.user)
+        for i in range(objects.count(), size):
+            obj = self.model.objects.create(user=self.user, name=f'Name {i}')
+            getattr(create_recipe(self.user), f'{self.name}s').add(obj)
+        get_list_cache().clear()
+
+    def assign(self, obj, size):
+        """Assign obj to size recipes."""
+        for _ in range(obj.recipe_set.count(), size):
+            obj.recipe_set.add(create_recipe(self.user))
+
+    def test_list(self):
+        self.assertQueryBudget(
+            f'{self.name}.list',
+            lambda size: self.client.get(self.url('list')),
+            self.grow_objects,
+        )
+
+    def test_list_with_recipe_count(self):
+        self.assertQueryBudget(
+            f'{self.name}.list_with_recipe_count',
+            lambda size: self.client.get(
+                self.url('list'), {'with_recipe_count': 1},
+            ),
+            self.grow_objects,
+        )
+
+    def test_list_assigned_only(self):
+        self.assertQueryBudget(
+            f'{self.name}.list_assigned_only',
+            lambda size: self.client.get(
+                self.url('list'), {'assigned_only': 1},
+            ),
+            self.grow_objects,
+        )
+
+    def test_autocomplete(self):
+        self.assertQueryBudget(
+            f'{self.name}.autocomplete',
+            lambda size: self.client.get(
+                self.url('autocomplete'), {'q': 'name', 'limit': 50},
+            ),
+            self.grow_objects,
+        )
+
+    def test_partial_update(self):
+        obj = self.model.objects.create(user=self.user, name='Original')
+        self.assertQueryBudget(
+            f'{self.name}.partial_update',
+            lambda size: self.client.patch(
+                self.url('detail', obj.id), {'name': f'Renamed {size}'},
+            ),
+            lambda size: self.assign(obj, size),
+        )
+
+    def test_destroy(self):
+        objects = {}
+
+        def populate(size):
+            objects[size] = self.model.objects.create(
+                user=self.user, name=f'Removed {size}',
+            )
+            self.assign(objects[size], size)
+
+        self.assertQueryBudget(
+            f'{self.name}.destroy',
+            lambda size: self.client.delete(
+                self.url('detail', objects[size].id)
+            ),
+            populate,
+        )
+
+
+class TagQueryBudgetTests(AttrQueryBudgetTests, BudgetTestCase):
+    """Test the tags API stays within its query budgets."""
+    model = Tag
+    name = 'tag'
+
+
+class IngredientQueryBudgetTests(AttrQueryBudgetTests, BudgetTestCase):
+    """Test the ingredients API stays within its query budgets."""
+    model = Ingredient
+    name = 'ingredient'
@@ -3,12 +3,18 @@ Test for recipe APIs.
 """
 
 from decimal import Decimal
+import hashlib
+import json
 import tempfile
 import os
+from unittest.mock import patch
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -16,10 +22,15 @@ from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
 
+from recipe.images import (
+    generate_variants, release_image, render_variants,
+)
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_CREATE_URL = reverse('recipe:recipe-bulk-create')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 def detail_url(recipe_id):
     """Create and return a recipe detail URL."""
@@ -79,7 +90,7 @@ class PrivateRecipeAPITests(TestCase):
 
         serializer = RecipeSerializer(recipes, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_recipe_list_limited_to_user(self):
@@ -96,7 +107,7 @@ class PrivateRecipeAPITests(TestCase):
 
         serializer = RecipeSerializer(recipes, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_get_recipe_detail(self):
@@ -234,6 +245,65 @@ class PrivateRecipeAPITests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_nested_query_count_constant(self):
+        """Test nested tags and ingredients are resolved in bulk."""
+        Tag.objects.create(user=self.user, name='Tag 0')
+        Ingredient.objects.create(user=self.user, name='Ing 0')
+
+        def create_with(count):
+            payload = {
+                'title': f'Recipe with {count}',
+                'time_minutes': 10,
+                'price': Decimal('1.00'),
+                'tags': [{'name': f'Tag {i}'} for i in range(count)],
+                'ingredients': [{'name': f'Ing {i}'} for i in range(count)],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(RECIPE_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create_with(2), create_with(25))
+        recipe = Recipe.objects.get(title='Recipe with 25')
+        self.assertEqual(recipe.tags.count(), 25)
+        self.assertEqual(recipe.ingredients.count(), 25)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 25)
+
+    def test_create_recipe_duplicate_tags_in_payload(self):
+        """Test repeated tag names in a payload create a single tag."""
+        payload = {
+            'title': 'Pad Thai',
+            'time_minutes': 20,
+            'price': Decimal('6.00'),
+            'tags': [{'name': 'Thai'}, {'name': 'Thai'}],
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(len(res.data['tags']), 1)
+
+    def test_create_recipe_tag_created_concurrently(self):
+        """Test a tag inserted by a concurrent writer is reused."""
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        payload = {
+            'title': 'Soup',
+            'time_minutes': 15,
+            'price': Decimal('3.00'),
+            'tags': [{'name': 'Lunch'}],
+        }
+
+        # Hide the existing tag from the lookup, as if it was inserted
+        # after the lookup ran.
+        with patch.object(Tag.objects, 'filter', return_value=Tag.objects.none()):
+            res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+
     def test_create_tag_on_update(self):
         """Test creating tag when updating a recipe."""
         recipe = create_recipe(user=self.user)
@@ -263,6 +333,48 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(tag_lunch, recipe.tags.all())
         self.assertNotIn(tag_breakfast, recipe.tags.all())
 
+    def test_update_recipe_tags_writes_only_changes(self):
+        """Test updating tags only deletes and inserts changed rows."""
+        recipe = create_recipe(user=self.user)
+        for name in ['Breakfast', 'Lunch', 'Dinner']:
+            recipe.tags.add(Tag.objects.create(user=self.user, name=name))
+
+        payload = {'tags': [{'name': 'Breakfast'}, {'name': 'Lunch'},
+                            {'name': 'Snack'}]}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        through_writes = [
+            q['sql'] for q in ctx.captured_queries
+            if 'core_recipe_tags' in q['sql']
+            and q['sql'].startswith(('INSERT', 'DELETE'))
+        ]
+        self.assertEqual(len(through_writes), 2)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Breakfast', 'Lunch', 'Snack'],
+        )
+
+    def test_update_recipe_same_tags_no_writes(self):
+        """Test resending unchanged tags does not touch the through table."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+
+        payload = {'tags': [{'name': 'Lunch'}]}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(
+            q['sql'].startswith(('INSERT', 'DELETE'))
+            for q in ctx.captured_queries
+        ))
+
     def test_clear_recipe_tags(self):
         """Test clearing a recipes tags."""
         tag = Tag.objects.create(user=self.user, name='Dessert')
@@ -392,9 +504,9 @@ class PrivateRecipeAPITests(TestCase):
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
 
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Test filtering recipes by ingredients."""
@@ -415,9 +527,288 @@ class PrivateRecipeAPITests(TestCase):
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
 
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes having every listed tag."""
+        tag1 = Tag.objects.create(user=self.user, name="Vegan")
+        tag2 = Tag.objects.create(user=self.user, name="Quick")
+        r1 = create_recipe(user=self.user, title="Vegan Quick Salad")
+        r2 = create_recipe(user=self.user, title="Vegan Stew")
+        r1.tags.add(tag1, tag2)
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [r1.id]
+        )
+
+    def test_filter_by_all_tags_and_ingredients(self):
+        """Test match=all applies to tags and ingredients together."""
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        in1 = Ingredient.objects.create(user=self.user, name="Rice")
+        in2 = Ingredient.objects.create(user=self.user, name="Beans")
+        r1 = create_recipe(user=self.user, title="Rice and Beans")
+        r2 = create_recipe(user=self.user, title="Fried Rice")
+        for recipe in (r1, r2):
+            recipe.tags.add(tag)
+            recipe.ingredients.add(in1)
+        r1.ingredients.add(in2)
+
+        params = {
+            'tags': str(tag.id),
+            'ingredients': f'{in1.id},{in2.id},{in1.id}',
+            'match': 'all',
+        }
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [r1.id]
+        )
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Test recipes matching several tags are listed once."""
+        tag1 = Tag.objects.create(user=self.user, name="Vegan")
+        tag2 = Tag.objects.create(user=self.user, name="Quick")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag1, tag2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(
+                RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'}
+            )
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertNotIn('DISTINCT', ctx.captured_queries[0]['sql'])
+
+    def test_filter_invalid_match(self):
+        """Test an unknown match mode is rejected."""
+        res = self.client.get(RECIPE_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes(self):
+        """Test full text search ranks title matches first."""
+        r1 = create_recipe(
+            user=self.user, title='Tomato Soup', description='Warming.',
+        )
+        r2 = create_recipe(
+            user=self.user, title='Pasta', description='With tomatoes.',
+        )
+        create_recipe(user=self.user, title='Pancakes', description='Sweet.')
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [r1.id, r2.id]
+        )
+
+    def test_search_combined_with_tags_paginated(self):
+        """Test search works with tag filters across pages."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        expected = []
+        for i in range(3):
+            recipe = create_recipe(user=self.user, title=f'Bean Chili {i}')
+            recipe.tags.add(tag)
+            expected.append(recipe.id)
+        create_recipe(user=self.user, title='Bean Stew')
+
+        params = {'search': 'chili', 'tags': str(tag.id), 'page_size': 2}
+        res = self.client.get(RECIPE_URL, params)
+        ids = [r['id'] for r in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(sorted(ids), expected)
+        self.assertIsNone(res.data['next'])
+
+    def test_search_vector_updated_on_write(self):
+        """Test edited recipes are found by their new title."""
+        recipe = create_recipe(user=self.user, title='Plain Rice')
+
+        self.client.patch(detail_url(recipe.id), {'title': 'Risotto'})
+        res = self.client.get(RECIPE_URL, {'search': 'risotto'})
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [recipe.id]
+        )
+
+    def test_list_recipes_query_count_constant(self):
+        """Test listing recipes does not run a query per recipe."""
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {i}')
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Ing {i}')
+            )
+
+        # One query for recipes, one per prefetched relation.
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_get_recipe_detail_query_count(self):
+        """Test recipe detail loads nested relations in fixed queries."""
+        recipe = create_recipe(user=self.user)
+        for name in ['Vegan', 'Dinner', 'Quick']:
+            recipe.tags.add(Tag.objects.create(user=self.user, name=name))
+
+        # The recipe with its related ids, then tag names. The recipe has
+        # no ingredients, so their names need no query.
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 3)
+
+    def test_recipe_list_paginated_by_cursor(self):
+        """Test recipes are paginated newest first with a cursor."""
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[4].id, recipes[3].id],
+        )
+        self.assertIsNotNone(res.data['next'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[2].id, recipes[1].id],
+        )
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'])
+
+    def test_recipe_list_page_size_capped(self):
+        """Test the requested page size is capped by the max page size."""
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        with self.settings(API_MAX_PAGE_SIZE=2):
+            res = self.client.get(RECIPE_URL, {'page_size': 50})
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_filter_by_tags_paginated(self):
+        """Test filtering by tags works across pages."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        tagged = []
+        for i in range(3):
+            recipe = create_recipe(user=self.user, title=f'Vegan {i}')
+            recipe.tags.add(tag)
+            tagged.append(recipe.id)
+            create_recipe(user=self.user, title=f'Other {i}')
+
+        params = {'tags': str(tag.id), 'page_size': 2}
+        res = self.client.get(RECIPE_URL, params)
+        ids = [r['id'] for r in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(ids, sorted(tagged, reverse=True))
+        self.assertIsNone(res.data['next'])
+
+
+class BulkCreateRecipeTests(TestCase):
+    """Test the recipe bulk create API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com", password="testpass1234",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count, prefix='Recipe'):
+        """Return a bulk payload of recipes sharing tags and ingredients."""
+        return [
+            {
+                'title': f'{prefix} {i}',
+                'time_minutes': 10 + i,
+                'price': '2.50',
+                'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+                'ingredients': [{'name': 'Salt'}, {'name': f'Ing {i}'}],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes with nested relations."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = self._payload(3)
+
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['title'] for item in res.data],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'],
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 4
+        )
+        recipe = Recipe.objects.get(id=res.data[1]['id'])
+        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Dinner', 'Tag 1'],
+        )
+        self.assertEqual(res.data[1], RecipeDetailSerializer(recipe).data)
+
+    def test_bulk_create_query_count_constant(self):
+        """Test bulk create runs a fixed number of queries."""
+        def create_with(count, prefix):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(
+                    BULK_CREATE_URL, self._payload(count, prefix),
+                    format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create_with(2, 'Small'), create_with(50, 'Large'))
+
+    def test_bulk_create_invalid_item_writes_nothing(self):
+        """Test an invalid item rejects the batch with per-item errors."""
+        payload = self._payload(2)
+        payload[1].pop('title')
+
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_create_limit(self):
+        """Test batches above the configured size are rejected."""
+        with self.settings(RECIPE_BULK_CREATE_MAX=2):
+            res = self.client.post(
+                BULK_CREATE_URL, self._payload(3), format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
 
 
 class ImageUploadTests(TestCase):
@@ -425,13 +816,27 @@ class ImageUploadTests(TestCase):
 
     def setUp(self):
         self.client = APIClient()
-        self.user = create_user(email="user@example.com", password="testpass1234")
+        self.user = create_user(
+            email="user@example.com", password="testpass1234",
+        )
         self.client.force_authenticate(self.user)
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
-        self.recipe.image.delete()
+        for recipe in Recipe.objects.filter(user=self.user):
+            for name in recipe.image_variants.values():
+                default_storage.delete(name)
+            recipe.image.delete()
 
+    def _upload(self, size=(10, 10)):
+        """Upload a JPEG of the given size and return the response."""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', size)
+            img.save(image_file, format='JPEG')
+            image_file.seek(0)
+            return self.client.post(
+                image_upload_url(self.recipe.id), {'image': image_file}
+            )
 
     def test_upload_image(self):
         """Test uploading an image to a recipe."""
@@ -449,6 +854,22 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_update_does_not_write_image(self):
+        """Test images are ignored by the recipe update endpoint."""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            res = self.client.patch(
+                detail_url(self.recipe.id),
+                {'title': 'Renamed', 'image': image_file},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'Renamed')
+        self.assertFalse(self.recipe.image)
+
     def test_upload_image_bad_request(self):
         """Test uploading invalid image."""
         url = image_upload_url(self.recipe.id)
@@ -456,4 +877,289 @@ class ImageUploadTests(TestCase):
 
         res = self.client.post(url, payload)
 
-        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=2000)
+    def test_upload_over_byte_limit_rejected(self):
+        """Test files over the byte limit are rejected while streaming."""
+        with tempfile.NamedTemporaryFile(suffix='.png') as image_file:
+            img = Image.frombytes('RGB', (100, 100), os.urandom(30000))
+            img.save(image_file, format='PNG')
+            image_file.seek(0)
+            res = self.client.post(
+                image_upload_url(self.recipe.id), {'image': image_file}
+            )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=50)
+    def test_upload_over_pixel_limit_rejected(self):
+        """Test images over the pixel limit are rejected."""
+        res = self._upload(size=(10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_returns_before_variants_ready(self):
+        """Test the upload response does not wait for the variants."""
+        res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_variants'], {})
+
+    @override_settings(RECIPE_IMAGE_ASYNC=False)
+    def test_upload_generates_variants(self):
+        """Test resized variants are generated and exposed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(2000, 1000))
+
+        self.recipe.refresh_from_db()
+        variants = self.recipe.image_variants
+        self.assertEqual(set(variants), {'thumb', 'medium', 'webp'})
+        with default_storage.open(variants['thumb']) as thumb:
+            self.assertEqual(Image.open(thumb).size, (200, 100))
+        with default_storage.open(variants['webp']) as webp:
+            self.assertEqual(Image.open(webp).format, 'WEBP')
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(
+            res.data['image_variants']['thumb'].endswith(variants['thumb'])
+        )
+
+    def test_stale_variants_discarded(self):
+        """Test variants of an image replaced while rendering are dropped."""
+        self._upload()
+        self.recipe.refresh_from_db()
+        name = self.recipe.image.name
+
+        def replace_while_rendering(name):
+            variants = render_variants(name)
+            Recipe.objects.filter(id=self.recipe.id).update(image='')
+            return variants
+
+        with patch(
+            'recipe.images.render_variants',
+            side_effect=replace_while_rendering,
+        ):
+            generate_variants(self.recipe.id, self.user.id, name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+        stem = os.path.splitext(name)[0]
+        self.assertFalse(default_storage.exists(f'{stem}_thumb.jpg'))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_identical_images_stored_once(self):
+        """Test uploading the same bytes twice stores a single file."""
+        other = create_recipe(user=self.user)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            digest = hashlib.sha256(image_file.read()).hexdigest()
+            for recipe in (self.recipe, other):
+                image_file.seek(0)
+                self.client.post(
+                    image_upload_url(recipe.id), {'image': image_file}
+                )
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+        self.assertIn(digest, self.recipe.image.name)
+
+    def test_shared_image_deleted_with_last_reference(self):
+        """Test a shared image is deleted when its last recipe goes."""
+        other = create_recipe(user=self.user)
+        self._upload()
+        self.recipe.refresh_from_db()
+        other.image = self.recipe.image.name
+        other.save()
+        path = self.recipe.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(RECIPE_IMAGE_ASYNC=False)
+    def test_variants_deleted_under_content_lock(self):
+        """Test variants are deleted in the transaction holding the lock."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload()
+        self.recipe.refresh_from_db()
+        name = self.recipe.image.name
+        variants = list(self.recipe.image_variants.values())
+        Recipe.objects.filter(id=self.recipe.id).update(image='')
+        depth = len(connection.savepoint_ids)
+        depths = []
+        delete = default_storage.delete
+
+        def record_depth(path):
+            depths.append(len(connection.savepoint_ids))
+            delete(path)
+
+        with patch.object(default_storage, 'delete', record_depth):
+            release_image(name, variants)
+
+        self.assertEqual(len(depths), len(variants))
+        self.assertTrue(all(d > depth for d in depths))
+        for path in variants:
+            self.assertFalse(default_storage.exists(path))
+
+    def test_replaced_image_released(self):
+        """Test replacing an image deletes the unreferenced old file."""
+        self._upload(size=(10, 10))
+        self.recipe.refresh_from_db()
+        old_path = self.recipe.image.path
+
+        self._upload(size=(20, 20))
+
+        self.assertFalse(os.path.exists(old_path))
+
+
+class SparseFieldsTests(TestCase):
+    """Test narrowing recipe responses with ?fields= and ?omit=."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(3)
+        ]
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        for recipe in self.recipes:
+            recipe.tags.add(tag)
+
+    def test_list_fields(self):
+        """Test listing recipes returns only the requested fields."""
+        res = self.client.get(RECIPE_URL, {'fields': 'title, id'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+        for item in res.data['results']:
+            self.assertEqual(list(item), ['id', 'title'])
+
+    def test_detail_omit(self):
+        """Test retrieving a recipe leaves out omitted fields."""
+        res = self.client.get(
+            detail_url(self.recipes[0].id), {'omit': 'description,tags'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('description', res.data)
+        self.assertNotIn('tags', res.data)
+        self.assertIn('ingredients', res.data)
+
+    def test_unknown_field_rejected(self):
+        """Test requesting an unknown field returns an error."""
+        res = self.client.get(RECIPE_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_fields_prune_query(self):
+        """Test unrequested columns and relations are not loaded."""
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(
+                RECIPE_FAST_READ_PATH=fast,
+            ), CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(
+                    detail_url(self.recipes[0].id), {'fields': 'id,title'},
+                )
+
+            self.assertEqual(res.data, {
+                'id': self.recipes[0].id, 'title': 'Recipe 0',
+            })
+            self.assertEqual(len(ctx.captured_queries), 1)
+            sql = ctx.captured_queries[0]['sql']
+            self.assertNotIn('description', sql)
+            self.assertNotIn('core_recipe_tags', sql)
+
+    def test_relation_fields_prune_columns(self):
+        """Test selecting only a relation loads no other recipe columns."""
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(
+                RECIPE_FAST_READ_PATH=fast,
+            ), CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(
+                    detail_url(self.recipes[0].id), {'fields': 'tags'},
+                )
+
+            self.assertEqual(list(res.data), ['tags'])
+            sql = ctx.captured_queries[0]['sql']
+            self.assertNotIn('search_vector', sql)
+            self.assertNotIn('description', sql)
+
+    def test_cursor_without_id_field(self):
+        """Test pages can be followed when the id is not requested."""
+        res = self.client.get(RECIPE_URL, {'fields': 'title', 'page_size': 2})
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.data['results'], [{'title': 'Recipe 0'}])
+
+
+class ExportTests(TestCase):
+    """Test the streaming NDJSON export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipes = []
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(tag)
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Ing {i}')
+            )
+            self.recipes.append(recipe)
+
+    def test_export_recipe_details(self):
+        """Test each line is a recipe detail, oldest first, in chunks."""
+        other = create_user(email='other@example.com', password='test123')
+        create_recipe(user=other)
+        expected = [
+            self.client.get(detail_url(recipe.id)).json()
+            for recipe in self.recipes
+        ]
+
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(
+                RECIPE_FAST_READ_PATH=fast, RECIPE_EXPORT_CHUNK_SIZE=2,
+            ):
+                res = self.client.get(EXPORT_URL)
+                chunks = list(res.streaming_content)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+            self.assertEqual(len(chunks), 3)
+            lines = b''.join(chunks).decode().splitlines()
+            self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_filtered(self):
+        """Test the list filters apply to the export."""
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        self.recipes[3].tags.add(tag)
+
+        res = self.client.get(EXPORT_URL, {'tags': str(tag.id)})
+        lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines], [self.recipes[3].id]
+        )
@@ -15,6 +15,7 @@ from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 def create_user(email='user@example.com', password='testpass123'):
     """Create and return a new user."""
@@ -57,7 +58,7 @@ class PrivateTagsAPITest(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test list of tags is limited to authenticated user."""
@@ -70,9 +71,9 @@ class PrivateTagsAPITest(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 
     def test_update_tag(self):
         """Test updating a tag."""
@@ -87,6 +88,17 @@ class PrivateTagsAPITest(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name(self):
+        """Test renaming a tag to an existing name is rejected."""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After Dinner')
+
     def test_delete_tag(self):
         """Test deleting a tag successful"""
         tag = Tag.objects.create(user=self.user, name='Breakfast')
@@ -118,8 +130,8 @@ class PrivateTagsAPITest(TestCase):
         s1 = TagSerializer(tag1)
         s2 = TagSerializer(tag2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
 
     def test_filtered_ingredients_unique(self):
@@ -145,4 +157,66 @@ class PrivateTagsAPITest(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only':1})
 
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tags_paginated_by_name(self):
+        """Test tags are paginated by name with assigned_only applied."""
+        recipe = Recipe.objects.create(
+            title='Pancakes',
+            time_minutes=5,
+            price=Decimal('5.00'),
+            user=self.user
+        )
+        for name in ['Breakfast', 'Dinner', 'Lunch', 'Snack']:
+            tag = Tag.objects.create(user=self.user, name=name)
+            recipe.tags.add(tag)
+        Tag.objects.create(user=self.user, name='Unused')
+
+        params = {'assigned_only': 1, 'page_size': 3}
+        res = self.client.get(TAGS_URL, params)
+        names = [t['name'] for t in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names += [t['name'] for t in res.data['results']]
+
+        self.assertEqual(names, ['Snack', 'Lunch', 'Dinner', 'Breakfast'])
+        self.assertIsNone(res.data['next'])
+
+    def test_tags_with_recipe_count(self):
+        """Test listing tags with the number of recipes using them."""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Dinner')
+        for title in ['Pancakes', 'Porridge']:
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=Decimal('2.00'),
+                user=self.user,
+            )
+            recipe.tags.add(breakfast)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'with_recipe_count': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(t['name'], t['recipe_count']) for t in res.data['results']],
+            [('Dinner', 0), ('Breakfast', 2)],
+        )
+
+    def test_autocomplete_tags(self):
+        """Test autocomplete matches tag names case insensitively."""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'BREAK'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': tag.id, 'name': 'Breakfast'}])
+
+    def test_autocomplete_tags_empty_query(self):
+        """Test an empty query returns no matches."""
+        Tag.objects.create(user=self.user, name='Breakfast')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': ''})
+
+        self.assertEqual(res.data, [])
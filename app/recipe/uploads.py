@@ -0,0 +1,91 @@
+"""
+Streaming, size-bounded handling of recipe image uploads.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import MultiPartParser
+
+# Allowance for the multipart boundaries and headers around the file.
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    """Upload exceeding the configured size limit."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Uploaded file is too large.'
+    default_code = 'upload_too_large'
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to disk, rejecting files over the byte and pixel limits.
+
+    Files are hashed while streaming for the content-addressed storage, and
+    the image dimensions are read from its header, so oversized images are
+    rejected before they are decoded.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        self.max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        self.received = 0
+
+    def _too_large(self):
+        return UploadTooLarge(
+            f'Image files may not exceed {self.max_bytes} bytes.'
+        )
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise self._too_large()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            # Closing the temporary file also removes it.
+            self.file.close()
+            raise self._too_large()
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width, height = self.max_pixels + 1, 1
+        except Exception:
+            # Left for the serializer to reject as an invalid image.
+            width, height = 0, 0
+        file.seek(0)
+
+        if width * height > self.max_pixels:
+            file.close()
+            raise ValidationError({self.field_name: [
+                f'Images may not exceed {self.max_pixels} pixels.'
+            ]})
+        return file
+
+
+class ImageUploadParser(MultiPartParser):
+    """Multipart parser streaming files through BoundedImageUploadHandler."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request._request.upload_handlers = [
+            BoundedImageUploadHandler(request._request)
+        ]
+        return super().parse(stream, media_type, parser_context)
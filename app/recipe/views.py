@@ -7,25 +7,56 @@ from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Prefetch
+from django.db.models.functions import Cast
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.authentication import CachedTokenAuthentication
 from core.models import (
     Recipe,
     Tag,
     Ingredient
 )
 
+from recipe.cache import CachedListMixin, invalidate_user_lists
+from recipe.export import ndjson_export
+from recipe.fastpath import FastReadMixin
+from recipe.images import release_image, schedule_variants
+from recipe.uploads import ImageUploadParser
+from recipe.pagination import (
+    RecipeCursorPagination,
+    NameCursorPagination,
+)
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
     TagSerializer,
+    TagCountSerializer,
     IngredientSerializer,
+    IngredientCountSerializer,
     RecipeImageSerializer,
 )
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return.',
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out.',
+    ),
+]
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -39,35 +70,129 @@ from recipe.serializers import (
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient IDs to filter',
-            )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Match recipes with any (default) or all of the '
+                            'listed tags and ingredients.',
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full text search over title and description, '
+                            'ordered by relevance.',
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListMixin, FastReadMixin, viewsets.ModelViewSet):
     """View for manage recipe APIs"""
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, query_string):
         """Conver a list of strings to integers."""
         return [int(str_id) for str_id in query_string.split(',')]
 
+    def _search_query(self):
+        """Return the full text search string of the request, if any."""
+        return self.request.query_params.get('search', '').strip()
+
+    def _field_names(self, param):
+        names = self.request.query_params.get(param, '')
+        return {name.strip() for name in names.split(',') if name.strip()}
+
+    def get_selected_fields(self):
+        """Return the fields picked by ?fields= and ?omit=, or None for all.
+
+        Only list and retrieve responses can be narrowed.
+        """
+        if self.action not in ('list', 'retrieve'):
+            return None
+        fields = self._field_names('fields')
+        omit = self._field_names('omit')
+        if not fields and not omit:
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        for param, names in [('fields', fields), ('omit', omit)]:
+            unknown = sorted(names.difference(available))
+            if unknown:
+                raise ValidationError(
+                    {param: [f'Unknown fields: {", ".join(unknown)}.']}
+                )
+        return tuple(
+            name for name in available
+            if (not fields or name in fields) and name not in omit
+        )
+
+    def get_serializer_context(self):
+        """Pass the selected fields to the serializer."""
+        context = super().get_serializer_context()
+        context['fields'] = self.get_selected_fields()
+        return context
+
+    def get_pagination_ordering(self):
+        """Order search results by relevance."""
+        if self._search_query():
+            return ('-rank', '-id')
+        return None
+
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': ['Must be "any" or "all".']})
+        match_all = match == 'all'
         queryset = self.queryset
 
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = queryset.with_tags(tag_ids, match_all)
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = queryset.with_ingredients(ingredient_ids, match_all)
+        if self._search_query():
+            query = SearchQuery(
+                self._search_query(), search_type='websearch',
+                config='english',
+            )
+            # Double precision so the rank round-trips through the cursor.
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+            )
+
+        # Nested items are ordered by id, as in recipe.fastpath.
+        prefetches = {
+            'tags': Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            'ingredients': Prefetch(
+                'ingredients', queryset=Ingredient.objects.order_by('id')
+            ),
+        }
+        fields = self.get_selected_fields()
+        if fields is not None:
+            # Load only the requested columns and relations.
+            # Always names a column, as only() without any clears the
+            # manager's deferral of search_vector.
+            queryset = queryset.only(
+                'id', *(name for name in fields if name not in prefetches)
+            )
+            prefetches = {
+                name: prefetch for name, prefetch in prefetches.items()
+                if name in fields
+            }
 
-        return queryset.filter(user=self.request.user).order_by('-id').distinct()
+        return queryset.filter(
+            user=self.request.user
+        ).prefetch_related(*prefetches.values()).order_by('-id')
 
     def perform_create(self, serializer):
         """Create new recipe."""
@@ -82,14 +207,79 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @extend_schema(
+        request=RecipeDetailSerializer(many=True),
+        responses=RecipeDetailSerializer(many=True),
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk-create')
+    def bulk_create(self, request):
+        """Create many recipes in a single transaction."""
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.RECIPE_BULK_CREATE_MAX,
+        )
+
+        if serializer.is_valid():
+            recipes = serializer.save(user=self.request.user)
+            # Bulk inserts bypass the signals that invalidate the cache.
+            invalidate_user_lists(self.request.user.pk)
+            created = self.get_queryset().filter(
+                id__in=[recipe.id for recipe in recipes]
+            ).order_by('id')
+            data = self.get_serializer(created, many=True).data
+            return Response(data, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        responses={(200, 'application/x-ndjson'): RecipeDetailSerializer},
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream the recipes as NDJSON, one recipe detail per line.
+
+        The list filters apply, recipes are exported oldest first.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        response = StreamingHttpResponse(
+            ndjson_export(
+                queryset,
+                self.get_serializer_class(),
+                self.get_serializer_context(),
+            ),
+            content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        # Lets proxies pass each chunk on as soon as it is written.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[ImageUploadParser],
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe."""
         recipe = self.get_object()
+        old_image = recipe.image.name
+        old_variants = list(recipe.image_variants.values())
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            # Holds the storage's content lock until the recipe references
+            # the stored file, so it cannot be released in between.
+            with transaction.atomic():
+                recipe = serializer.save(image_variants={})
+            if old_image != recipe.image.name:
+                release_image(old_image, old_variants)
+            # Variants of the new image are generated in the background.
+            schedule_variants(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -101,34 +291,91 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0,1],
                 description='Filter by items assigned to recipes.',
-            )
+            ),
+            OpenApiParameter(
+                'with_recipe_count',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Include the number of recipes using each item.',
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
-                 mixins.UpdateModelMixin,
-                 mixins.ListModelMixin, viewsets.GenericViewSet):
+class BaseRecipeAttrViewSet(CachedListMixin,
+                            mixins.DestroyModelMixin,
+                            mixins.UpdateModelMixin,
+                            mixins.ListModelMixin, viewsets.GenericViewSet):
     """Base viewset for recipe attributes Tags and Ingredients."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NameCursorPagination
+
+    def _flag_param(self, name):
+        """Return a 0/1 query parameter as a boolean."""
+        return bool(int(self.request.query_params.get(name, 0)))
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
         queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        if self._flag_param('assigned_only'):
+            queryset = queryset.assigned()
+        if self.action == 'list' and self._flag_param('with_recipe_count'):
+            queryset = queryset.with_recipe_count()
+
+        return queryset.filter(user=self.request.user).order_by('-name')
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'list' and self._flag_param('with_recipe_count'):
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q', OpenApiTypes.STR, description='Partial name to match.',
+            ),
+            OpenApiParameter(
+                'limit', OpenApiTypes.INT,
+                description='Maximum number of matches to return.',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False, pagination_class=None)
+    def autocomplete(self, request):
+        """Return the names best matching a partial name."""
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.AUTOCOMPLETE_DEFAULT_LIMIT
+            ))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        limit = max(1, min(limit, settings.AUTOCOMPLETE_MAX_LIMIT))
+
+        if not query:
+            return Response([])
+
+        return Response(self.queryset.owned_by(
+            request.user,
+        ).autocomplete(query, limit))
 
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+    def perform_update(self, serializer):
+        """Update the object, rejecting names the user already has."""
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'name': ['This name is already in use.']})
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database."""
     serializer_class = TagSerializer
+    count_serializer_class = TagCountSerializer
     queryset = Tag.objects.all()
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients the database."""
     serializer_class = IngredientSerializer
+    count_serializer_class = IngredientCountSerializer
     queryset = Ingredient.objects.all()
@@ -0,0 +1,82 @@
+"""
+Tests pinning the queries of the user API to their budgets.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.testing import QueryBudgetMixin
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the user API stays within its query budgets."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+
+    def grow_users(self, size):
+        """Add users with tokens until there are size others."""
+        User = get_user_model()
+        for i in range(User.objects.count() - 1, size):
+            Token.objects.create(
+                user=create_user(email=f'other{i}@example.com'),
+            )
+
+    def _authenticate(self):
+        """Authenticate the client with a real token."""
+        self.budget_token = Token.objects.create(user=self.user).key
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.budget_token}',
+        )
+
+    def test_create(self):
+        emails = (f'new{i}@example.com' for i in itertools.count())
+        self.assertQueryBudget(
+            'user.create',
+            lambda size: self.client.post(CREATE_USER_URL, {
+                'email': next(emails),
+                'password': 'testpass123',
+                'name': 'New User',
+            }),
+            self.grow_users,
+        )
+
+    def test_token(self):
+        self.assertQueryBudget(
+            'user.token',
+            lambda size: self.client.post(TOKEN_URL, {
+                'email': self.user.email, 'password': 'testpass123',
+            }),
+            self.grow_users,
+        )
+
+    def test_me(self):
+        self._authenticate()
+        self.assertQueryBudget(
+            'user.me',
+            lambda size: self.client.get(ME_URL),
+            self.grow_users,
+        )
+
+    def test_me_update(self):
+        self._authenticate()
+        self.assertQueryBudget(
+            'user.me_update',
+            lambda size: self.client.patch(ME_URL, {'name': f'Name {size}'}),
+            self.grow_users,
+        )
@@ -1,9 +1,11 @@
 """
 Views for the user API
 """
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+
+from core.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSeriallizer
 
 class CreatUserView(generics.CreateAPIView):
@@ -19,7 +21,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
     # How the user proves who they are (Token)
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     # Only logged-in users can use this view
     permission_classes = [permissions.IsAuthenticated]
 